@@ -107,4 +107,61 @@ def all_filters_and_rotations(cell):
             flipped = cv2.flip(rot, 1)  # flip horizontal
             augmented.append(flipped)
 
-    return augmented  # Lista de imágenes (cada una 64x64x3 RGB)
\ No newline at end of file
+    return augmented  # Lista de imágenes (cada una 64x64x3 RGB)
+
+def all_filters_and_rotations_batch(cells):
+    """
+    Versión vectorizada de all_filters_and_rotations para N casillas a la vez.
+    Cada filtro se calcula una sola vez sobre las casillas apiladas (N, 64, 64) y las
+    rotaciones y flips se obtienen como vistas de NumPy (np.rot90, slicing), sin copias
+    intermedias. El resultado es idéntico bit a bit a apilar all_filters_and_rotations(cell).
+    Devuelve un array (N, 40, 64, 64, 3) en RGB.
+    """
+    cells = np.stack([cv2.resize(cell, (64, 64)) for cell in cells])  # (N, 64, 64, 3) BGR
+    n = len(cells)
+
+    # Escala de grises una sola vez para todas las casillas (conversión píxel a píxel)
+    gray = cv2.cvtColor(cells.reshape(n * 64, 64, 3), cv2.COLOR_BGR2GRAY).reshape(n, 64, 64)
+
+    # Binarización: cada casilla lleva su propio borde replicado (como BORDER_REPLICATE|BORDER_ISOLATED)
+    padded = np.pad(gray, ((0, 0), (5, 5), (5, 5)), mode='edge')
+    thresh = cv2.adaptiveThreshold(
+        padded.reshape(n * 74, 74), 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    ).reshape(n, 74, 74)[:, 5:-5, 5:-5]
+
+    # Sobel: borde reflejado por casilla (BORDER_REFLECT_101, el de cv2.Sobel por defecto)
+    padded = np.pad(gray, ((0, 0), (1, 1), (1, 1)), mode='reflect').reshape(n * 66, 66)
+    sobelx = cv2.Sobel(padded, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(padded, cv2.CV_64F, 0, 1, ksize=3)
+    sobel = cv2.magnitude(sobelx, sobely).reshape(n, 66, 66)[:, 1:-1, 1:-1]
+    sobel = np.uint8(np.clip(sobel, 0, 255))
+
+    # Canny: la histéresis conecta bordes entre píxeles vecinos, así que se aplica por casilla
+    canny = np.stack([cv2.Canny(g, 100, 200) for g in gray])
+
+    augmented = np.empty((n, 5, 8, 64, 64, 3), dtype=np.uint8)
+
+    # Filtros de un canal: rotaciones y flips sobre los planos (N, 4, 64, 64) y paso a RGB al final
+    planes = np.stack([gray, thresh, sobel, canny], axis=1)
+    rotated = np.empty((n, 4, 8, 64, 64), dtype=np.uint8)
+    rotations_and_flips_views(planes, rotated)
+    augmented[:, 1:] = cv2.cvtColor(rotated.reshape(-1, 64), cv2.COLOR_GRAY2RGB).reshape(n, 4, 8, 64, 64, 3)
+
+    # Imagen RGB: cada píxel se ve como un único elemento de 3 bytes para rotar píxeles enteros
+    rgb = cv2.cvtColor(cells.reshape(n * 64, 64, 3), cv2.COLOR_BGR2RGB).reshape(n, 64, 64, 3)
+    rotations_and_flips_views(rgb.view('V3')[..., 0], augmented[:, 0].view('V3')[..., 0])
+
+    return augmented.reshape(n, -1, 64, 64, 3)
+
+
+def rotations_and_flips_views(stack, out):
+    """
+    Escribe en out[..., j, :, :] las rotaciones (0°, 90°, 180°, 270°) y flips horizontales de stack[..., :, :]
+    en el mismo orden que all_filters_and_rotations, usando vistas de NumPy.
+    """
+    for k in range(4):
+        # np.rot90 con k negativo gira en sentido horario, igual que cv2.rotate
+        rot = np.rot90(stack, k=-k, axes=(-2, -1))
+        out[..., 2 * k, :, :] = rot
+        out[..., 2 * k + 1, :, :] = rot[..., ::-1]  # flip horizontal
\ No newline at end of file
@@ -0,0 +1,175 @@
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+import tensorflow as tf
+from aply_filters import all_filters_and_rotations_batch
+from crop_board import crop_and_divide_board
+from inference_backend import load_backend
+
+# =============================================================================
+# DATOS DE CALIBRACIÓN
+# =============================================================================
+
+
+def load_board_batches(dataset_folder, margin_pct=0.05, max_boards=None):
+    """
+    Genera, para cada tablero de la carpeta, el lote de TTA que recibe el modelo en inferencia:
+    (64 * n_aug, 64, 64, 3) en float32 normalizado a [0, 1].
+    """
+    fnames = sorted(f for f in os.listdir(dataset_folder) if f.endswith('.jpeg') or f.endswith('.png'))
+    n_boards = 0
+    for fname in fnames:
+        if max_boards is not None and n_boards >= max_boards:
+            break
+        img = cv2.imread(os.path.join(dataset_folder, fname))
+        if img is None:
+            print(f"No se pudo leer {fname}")
+            continue
+        try:
+            cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
+        except ValueError as e:
+            print(f"{fname}: {e}")
+            continue
+        n_boards += 1
+        yield all_filters_and_rotations_batch(cells).reshape(-1, 64, 64, 3).astype(np.float32) / 255.0
+
+
+def reservoir_sample(batches, n_samples, rng):
+    """
+    Muestreo de reservorio: n_samples filas escogidas al azar (con la misma probabilidad) entre todas
+    las filas de los lotes, recorriéndolos una sola vez y guardando solo las filas escogidas.
+    """
+    sample, seen = [], 0
+    for X in batches:
+        for row in X:
+            if len(sample) < n_samples:
+                sample.append(row.copy())
+            else:
+                j = rng.integers(seen + 1)
+                if j < n_samples:
+                    sample[j] = row.copy()
+            seen += 1
+    return sample
+
+
+def representative_dataset(dataset_folder, n_samples=500, seed=42):
+    """
+    Devuelve el generador de calibración para la cuantización int8: n_samples imágenes
+    aumentadas escogidas al azar entre todos los tableros de la carpeta. Los tableros se
+    procesan de uno en uno, así que en memoria solo hay un lote de TTA y la muestra.
+    """
+    sample = reservoir_sample(load_board_batches(dataset_folder), n_samples, np.random.default_rng(seed))
+
+    def generator():
+        for x in sample:
+            yield [x[np.newaxis]]
+
+    return generator
+
+# =============================================================================
+# CONVERSIÓN
+# =============================================================================
+
+
+def convert_tflite(model, output_path, quantization='float16', dataset_folder=None):
+    """
+    Convierte el modelo de Keras a TFLite con cuantización post-entrenamiento.
+    :param quantization: 'float16' (pesos en float16) o 'int8' (pesos y activaciones en int8,
+                         calibrado con las imágenes de dataset_folder)
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if dataset_folder is None:
+            raise ValueError("La cuantización int8 necesita imágenes de calibración")
+        converter.representative_dataset = representative_dataset(dataset_folder)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Cuantización no soportada: {quantization}")
+
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    return output_path
+
+
+def convert_onnx(model, output_path):
+    """Convierte el modelo de Keras a ONNX (requiere tf2onnx)."""
+    import tf2onnx
+    spec = (tf.TensorSpec((None, 64, 64, 3), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=output_path)
+    return output_path
+
+# =============================================================================
+# PARIDAD Y RENDIMIENTO
+# =============================================================================
+
+
+def check_parity(reference, candidate, board_batches):
+    """
+    Compara un backend convertido con el modelo de referencia (Keras) sobre los mismos lotes de TTA.
+    Devuelve la coincidencia de etiquetas por casilla (tras promediar la TTA), la coincidencia
+    por imagen aumentada, la diferencia máxima de probabilidad y la latencia media por tablero.
+    """
+    cell_agree, view_agree, max_diff, latencies = [], [], 0.0, []
+    for X in board_batches:
+        ref = reference.predict(X, verbose=0)
+        start = time.perf_counter()
+        pred = candidate.predict(X, verbose=0)
+        latencies.append(time.perf_counter() - start)
+
+        n_aug = len(X) // 64
+        ref_cells = ref.reshape(64, n_aug, -1).mean(axis=1).argmax(axis=1)
+        pred_cells = pred.reshape(64, n_aug, -1).mean(axis=1).argmax(axis=1)
+        cell_agree.append(np.mean(ref_cells == pred_cells))
+        view_agree.append(np.mean(ref.argmax(axis=1) == pred.argmax(axis=1)))
+        max_diff = max(max_diff, float(np.abs(ref - pred).max()))
+
+    return {
+        'acuerdo_casillas': float(np.mean(cell_agree)),
+        'acuerdo_aumentos': float(np.mean(view_agree)),
+        'max_diff_prob': max_diff,
+        'latencia_tablero_s': float(np.mean(latencies)),
+    }
+
+
+def main(model_path, data_path, output_dir, formats, parity_boards):
+    model = tf.keras.models.load_model(model_path)
+    base = os.path.splitext(os.path.basename(model_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    outputs = {}
+    for fmt in formats:
+        if fmt == 'onnx':
+            outputs[fmt] = convert_onnx(model, os.path.join(output_dir, f"{base}.onnx"))
+        else:
+            outputs[fmt] = convert_tflite(model, os.path.join(output_dir, f"{base}_{fmt}.tflite"),
+                                          quantization=fmt, dataset_folder=data_path)
+        print(f"[{fmt}] Modelo guardado en: {outputs[fmt]}")
+
+    # Paridad con el modelo de Keras sobre los mismos tableros
+    board_batches = list(load_board_batches(data_path, max_boards=parity_boards))
+    print(f"[keras] Tamaño: {os.path.getsize(model_path) / 1e6:.2f} MB")
+    for fmt, path in outputs.items():
+        results = check_parity(model, load_backend(path), board_batches)
+        print(f"[{fmt}] Tamaño: {os.path.getsize(path) / 1e6:.2f} MB | "
+              f"Acuerdo casillas: {results['acuerdo_casillas']:.4f} | "
+              f"Acuerdo aumentos: {results['acuerdo_aumentos']:.4f} | "
+              f"Máx. diferencia: {results['max_diff_prob']:.4f} | "
+              f"Latencia/tablero: {results['latencia_tablero_s']:.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model_path', type=str, default='my_model.h5', help='Modelo de Keras a convertir')
+    parser.add_argument('--data_path', type=str, default='img', help='Tableros para calibración y paridad')
+    parser.add_argument('--output_dir', type=str, default='.', help='Carpeta de salida de los modelos')
+    parser.add_argument('--formats', nargs='+', default=['float16', 'int8'], choices=['float16', 'int8', 'onnx'],
+                        help='Formatos a generar')
+    parser.add_argument('--parity_boards', type=int, default=5, help='Tableros usados en la comprobación de paridad')
+    args = parser.parse_args()
+
+    main(args.model_path, args.data_path, args.output_dir, args.formats, args.parity_boards)
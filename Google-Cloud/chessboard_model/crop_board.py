@@ -9,6 +9,9 @@ import matplotlib.pyplot as plt
 IMG_NAME = "img/board1.jpeg"  # Nombre de la imagen a procesar
 GREEN_CORNERS_HSV = [[[35, 50, 50], [85, 255, 255]]]  # Rangos de color verde
 MIN_CONTOUR_AREA = 0  # Área mínima para detección de esquinas
+CELL_SIZE = 64  # Lado de casilla que recibe el clasificador; el warp genera directamente este tamaño
+WARP_INTERPOLATION = cv2.INTER_LINEAR  # Interpolación de warpPerspective
+WARP_PRE_PYRAMID = False  # Si True, reduce con INTER_AREA la zona del tablero antes del warp (antialiasing)
 DEBUG_MODE = False  # Activar para mostrar imágenes de debug
 MASK = GREEN_CORNERS_HSV
 
@@ -70,12 +73,46 @@ def order_corners(corners):
     return np.array(ordered[:4], dtype=np.float32)
 
 
-def transform_board(img, corners):
-    """Aplica transformación de perspectiva al tablero"""
-    side = max(img.shape[:2])
+def board_side(margin_pct, cell_size=CELL_SIZE):
+    """Lado del tablero enderezado para que, tras recortar margin_pct por borde, cada casilla mida cell_size."""
+    return int(np.ceil(8 * cell_size / (1 - 2 * margin_pct)))
+
+
+def pyramid_down_board(img, corners, side):
+    """
+    Recorta la zona del tablero y la reduce con INTER_AREA hasta que su lado más largo mida
+    aproximadamente side, para que el warp posterior no tenga que saltarse píxeles (aliasing).
+    Devuelve la imagen reducida y las esquinas en sus coordenadas.
+    """
+    edge = np.linalg.norm(np.roll(corners, -1, axis=0) - corners, axis=1).max()
+    scale = side / edge
+    if scale >= 1:
+        return img, corners
+    h, w = img.shape[:2]
+    x1, y1 = np.maximum(np.floor(corners.min(axis=0)).astype(int) - 2, 0)
+    x2, y2 = np.minimum(np.ceil(corners.max(axis=0)).astype(int) + 3, [w, h])
+    crop = img[y1:y2, x1:x2]
+    small = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    # Conversión de coordenadas teniendo en cuenta que resize alinea los centros de los píxeles
+    ratio = np.array([small.shape[1] / crop.shape[1], small.shape[0] / crop.shape[0]], np.float32)
+    return small, ((corners - [x1, y1] + 0.5) * ratio - 0.5).astype(np.float32)
+
+
+def transform_board(img, corners, side=None, interpolation=None, pre_pyramid=None):
+    """
+    Aplica transformación de perspectiva al tablero.
+    :param side: Lado del cuadrado de salida (por defecto max(img.shape[:2]); detect_and_crop_board
+                 usa board_side para generar directamente casillas de CELL_SIZE)
+    :param interpolation: Interpolación del warp (por defecto WARP_INTERPOLATION)
+    :param pre_pyramid: Si True, reduce antes la zona del tablero con INTER_AREA (por defecto WARP_PRE_PYRAMID)
+    """
+    side = side or max(img.shape[:2])
+    interpolation = WARP_INTERPOLATION if interpolation is None else interpolation
+    if WARP_PRE_PYRAMID if pre_pyramid is None else pre_pyramid:
+        img, corners = pyramid_down_board(img, corners, side)
     dst_pts = np.array([[0,0], [side,0], [side,side], [0,side]], dtype=np.float32)
     M = cv2.getPerspectiveTransform(corners, dst_pts)
-    warped = cv2.warpPerspective(img, M, (side, side))
+    warped = cv2.warpPerspective(img, M, (side, side), flags=interpolation)
     return warped
 
 
@@ -139,7 +176,7 @@ def crop_and_divide_board(img, margin_pct=0.08, debug=False):
     if ordered_corners is None:
         raise ValueError("No se detectaron suficientes esquinas verdes (se necesitan 4)")
 
-    warped = transform_board(img, ordered_corners)
+    warped = transform_board(img, ordered_corners, side=board_side(margin_pct))
     board = crop_board(warped, margin_pct)
     _, cells = divide_board(board)
 
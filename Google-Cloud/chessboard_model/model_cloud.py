@@ -2,7 +2,8 @@ import argparse
 import numpy as np
 from tensorflow.keras import layers, models
 from sklearn.model_selection import train_test_split
-from load_data import load_augmented_dataset, load_dataset_with_filters, load_dataset, load_dataset_with_all_filters_and_rotations
+from load_data import load_augmented_dataset, load_dataset_with_filters, load_dataset, load_dataset_with_all_filters_and_rotations, load_cached_dataset
+from aply_filters import all_filters_and_rotations_batch
 
 import tensorflow as tf
 
@@ -19,17 +20,59 @@ piece_to_idx = {
 def encode_labels(y):
     return np.array([piece_to_idx[label] for label in y])
 
-def main(data_path, model_output_path):
-    # Carga los datos (puede ser una ruta local o gs://)
-    X, y = load_dataset_with_all_filters_and_rotations(data_path, margin_pct=0.05)
-    print(f"Total de imágenes aumentadas: {len(X)}")
+# Número de imágenes aumentadas que genera cada casilla (filtros x rotaciones/flips)
+N_AUG = all_filters_and_rotations_batch(np.zeros((1, 64, 64, 3), np.uint8)).shape[1]
+
+
+def augment_batch(cells, labels):
+    """
+    Aplica filtros y rotaciones a un lote de casillas dentro del grafo de tf.data.
+    La parte de OpenCV se ejecuta con tf.numpy_function y la normalización a float32 se hace ya en TensorFlow.
+    """
+    augmented = tf.numpy_function(all_filters_and_rotations_batch, [cells], tf.uint8)
+    augmented = tf.reshape(augmented, [-1, 64, 64, 3])
+    augmented = tf.cast(augmented, tf.float32) / 255.0
+    return augmented, tf.repeat(labels, N_AUG)
+
+
+def make_dataset(X, y, indices, batch_size=32, shuffle=False, cells_per_map=64):
+    """
+    Pipeline tf.data que lee las casillas originales del memmap, las guarda en caché (solo las casillas,
+    sin aumentar), genera los aumentos en paralelo y los sirve por lotes con prefetch.
+    La memoria no depende del número de aumentos: solo hay cells_per_map * N_AUG imágenes aumentadas por hilo.
+    """
+    def generator():
+        for i in indices:
+            yield X[i], y[i]
+
+    ds = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(tf.TensorSpec((64, 64, 3), tf.uint8), tf.TensorSpec((), tf.int64)),
+    )
+    ds = ds.cache()
+    if shuffle:
+        ds = ds.shuffle(len(indices), reshuffle_each_iteration=True)
+    ds = ds.batch(cells_per_map)
+    ds = ds.map(augment_batch, num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.unbatch()
+    if shuffle:
+        # Mezcla las vistas aumentadas de casillas distintas dentro de cada lote
+        ds = ds.shuffle(cells_per_map * N_AUG)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def main(data_path, model_output_path, cache_dir='cell_cache'):
+    # Carga las casillas originales desde la caché en disco (memmap); los aumentos se generan en el pipeline
+    X, y = load_cached_dataset(data_path, cache_dir, margin_pct=0.05)
+    print(f"Total de casillas: {len(X)} ({len(X) * N_AUG} imágenes aumentadas por época)")
     y_enc = encode_labels(y)
-    X = X / 255.0
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y_enc, test_size=0.2, random_state=42)
+    # El split se hace por casilla, así las vistas aumentadas de una casilla no se reparten entre train y test
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    train_ds = make_dataset(X, y_enc, np.sort(train_idx), shuffle=True)
+    test_ds = make_dataset(X, y_enc, np.sort(test_idx))
 
     model = models.Sequential([
-        layers.Conv2D(32, (3,3), activation='relu', input_shape=X_train.shape[1:]),
+        layers.Conv2D(32, (3,3), activation='relu', input_shape=(64, 64, 3)),
         layers.MaxPooling2D((2,2)),
         layers.Conv2D(64, (3,3), activation='relu'),
         layers.MaxPooling2D((2,2)),
@@ -39,7 +82,7 @@ def main(data_path, model_output_path):
     ])
 
     model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
-    model.fit(X_train, y_train, epochs=10, validation_data=(X_test, y_test))
+    model.fit(train_ds, epochs=10, validation_data=test_ds)
 
     # Guarda el modelo en Cloud Storage o localmente
     save_model_to_gcs(model, model_output_path)
@@ -49,6 +92,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--data_path', type=str, required=True, help='Ruta a la carpeta de imágenes (puede ser gs://...)')
     parser.add_argument('--model_output_path', type=str, required=True, help='Ruta de salida del modelo (puede ser gs://...)')
+    parser.add_argument('--cache_dir', type=str, default='cell_cache', help='Carpeta local de la caché de casillas')
     args = parser.parse_args()
 
-    main(args.data_path, args.model_output_path)
+    main(args.data_path, args.model_output_path, args.cache_dir)
@@ -99,4 +99,124 @@ def all_filters_and_rotations(cell):
         augmented.append(cv2.rotate(img, cv2.ROTATE_180))
         augmented.append(cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE))
 
-    return augmented  # Lista de imágenes (cada una 64x64x3 RGB)
\ No newline at end of file
+    return augmented  # Lista de imágenes (cada una 64x64x3 RGB)
+
+def all_filters_and_rotations_batch(cells):
+    """
+    Versión vectorizada de all_filters_and_rotations para N casillas a la vez.
+    Cada filtro se calcula una sola vez sobre las casillas apiladas (N, 64, 64) y las
+    rotaciones se obtienen como vistas de NumPy (np.rot90, slicing), sin copias
+    intermedias. El resultado es idéntico bit a bit a apilar all_filters_and_rotations(cell).
+    Devuelve un array (N, 20, 64, 64, 3) en RGB.
+    """
+    cells = np.stack([cv2.resize(cell, (64, 64)) for cell in cells])  # (N, 64, 64, 3) BGR
+    n = len(cells)
+
+    # Escala de grises una sola vez para todas las casillas (conversión píxel a píxel)
+    gray = cv2.cvtColor(cells.reshape(n * 64, 64, 3), cv2.COLOR_BGR2GRAY).reshape(n, 64, 64)
+
+    # Binarización: cada casilla lleva su propio borde replicado (como BORDER_REPLICATE|BORDER_ISOLATED)
+    padded = np.pad(gray, ((0, 0), (5, 5), (5, 5)), mode='edge')
+    thresh = cv2.adaptiveThreshold(
+        padded.reshape(n * 74, 74), 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    ).reshape(n, 74, 74)[:, 5:-5, 5:-5]
+
+    # Sobel: borde reflejado por casilla (BORDER_REFLECT_101, el de cv2.Sobel por defecto)
+    padded = np.pad(gray, ((0, 0), (1, 1), (1, 1)), mode='reflect').reshape(n * 66, 66)
+    sobelx = cv2.Sobel(padded, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(padded, cv2.CV_64F, 0, 1, ksize=3)
+    sobel = cv2.magnitude(sobelx, sobely).reshape(n, 66, 66)[:, 1:-1, 1:-1]
+    sobel = np.uint8(np.clip(sobel, 0, 255))
+
+    # Canny: la histéresis conecta bordes entre píxeles vecinos, así que se aplica por casilla
+    canny = np.stack([cv2.Canny(g, 100, 200) for g in gray])
+
+    rgb = cv2.cvtColor(cells.reshape(n * 64, 64, 3), cv2.COLOR_BGR2RGB).reshape(n, 64, 64, 3)
+    return stack_filters_and_rotations(rgb, [gray, thresh, sobel, canny])
+
+
+def stack_filters_and_rotations(rgb, planes):
+    """
+    Construye el array (N, 20, 64, 64, 3) de all_filters_and_rotations_batch a partir de la
+    imagen RGB (N, 64, 64, 3) y los planos de un canal [gris, binarización, sobel, canny] (N, 64, 64).
+    """
+    n = len(rgb)
+    augmented = np.empty((n, 1 + len(planes), 4, 64, 64, 3), dtype=np.uint8)
+
+    # Filtros de un canal: rotaciones sobre los planos (N, 4, 64, 64) y paso a RGB al final
+    planes = np.stack(planes, axis=1)
+    rotated = np.empty((n, planes.shape[1], 4, 64, 64), dtype=np.uint8)
+    rotations_and_flips_views(planes, rotated)
+    augmented[:, 1:] = cv2.cvtColor(rotated.reshape(-1, 64), cv2.COLOR_GRAY2RGB).reshape(rotated.shape + (3,))
+
+    # Imagen RGB: cada píxel se ve como un único elemento de 3 bytes para rotar píxeles enteros
+    rgb = np.ascontiguousarray(rgb)
+    rotations_and_flips_views(rgb.view('V3')[..., 0], augmented[:, 0].view('V3')[..., 0])
+
+    return augmented.reshape(n, -1, 64, 64, 3)
+
+
+def rotations_and_flips_views(stack, out):
+    """
+    Escribe en out[..., j, :, :] las rotaciones (0°, 90°, 180°, 270°) de stack[..., :, :]
+    en el mismo orden que all_filters_and_rotations, usando vistas de NumPy.
+    """
+    for k in range(4):
+        # np.rot90 con k negativo gira en sentido horario, igual que cv2.rotate
+        rot = np.rot90(stack, k=-k, axes=(-2, -1))
+        out[..., k, :, :] = rot
+
+
+def board_filter_planes(board, size=512):
+    """
+    Redimensiona el tablero recortado una sola vez (8 casillas de size // 8 píxeles por lado) y aplica
+    gris, binarización adaptativa, Sobel, Canny y canal V de HSV sobre el tablero completo.
+    Los filtros de vecindad ven los píxeles de las casillas vecinas en vez del borde de cada casilla.
+    :param board: Imagen del tablero recortado (BGR), por ejemplo la de detect_and_crop_board
+    :param size: Lado del tablero redimensionado
+    :return: Tupla (tablero BGR, gris, binarización, sobel, canny, canal V), todos de size x size
+    """
+    # Mismas 64 casillas que divide_board: se descarta el resto si el lado no es múltiplo de 8
+    cell_size = board.shape[0] // 8
+    board = cv2.resize(board[:8 * cell_size, :8 * cell_size], (size, size))
+
+    gray = cv2.cvtColor(board, cv2.COLOR_BGR2GRAY)
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, 11, 2)
+    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+    sobel = np.uint8(np.clip(cv2.magnitude(sobelx, sobely), 0, 255))
+    canny = cv2.Canny(gray, 100, 200)
+    v = cv2.cvtColor(board, cv2.COLOR_BGR2HSV)[:, :, 2]
+    return board, gray, thresh, sobel, canny, v
+
+
+def board_cells_view(plane):
+    """
+    Devuelve las 64 casillas de un plano del tablero (size x size[, C]) como una vista
+    (8, 8, size // 8, size // 8[, C]) sin copiar píxeles, en el mismo orden fila/columna que divide_board.
+    """
+    s = plane.shape[0] // 8
+    return plane.reshape(8, s, 8, s, *plane.shape[2:]).swapaxes(1, 2)
+
+
+def board_apply_filters(board):
+    """
+    Equivalente a apply_filters sobre las 64 casillas, pero filtrando el tablero completo una sola vez.
+    Devuelve una vista (8, 8, 64, 64, 5) con los canales [gris, binarización, sobel, canny, V].
+    """
+    _, gray, thresh, sobel, canny, v = board_filter_planes(board)
+    filtered = np.stack([gray, thresh, sobel, canny, v], axis=-1)
+    return board_cells_view(filtered)
+
+
+def board_filters_and_rotations(board):
+    """
+    Equivalente a all_filters_and_rotations_batch sobre las 64 casillas, pero filtrando el tablero
+    completo una sola vez. Devuelve un array (64, 20, 64, 64, 3) en RGB.
+    """
+    board, gray, thresh, sobel, canny, _ = board_filter_planes(board)
+    rgb = cv2.cvtColor(board, cv2.COLOR_BGR2RGB)
+    cells = [board_cells_view(p).reshape(64, 64, 64, *p.shape[2:]) for p in (rgb, gray, thresh, sobel, canny)]
+    return stack_filters_and_rotations(cells[0], cells[1:])
\ No newline at end of file
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+from crop_board import BoardTracker
+from occlusion_gate import OcclusionGate
+
+# =============================================================================
+# SESIONES DEL MODO GRABAR
+# =============================================================================
+# En el modo grabar la web manda un fotograma cada pocos segundos y entre dos fotogramas
+# normalmente solo cambian las 2-4 casillas de la última jugada. Cada sesión guarda una
+# firma de píxeles de cada casilla y su última etiqueta, y solo se vuelven a clasificar
+# con la CNN las casillas cuya firma ha cambiado. También guarda un BoardTracker para no
+# repetir la detección de esquinas mientras la cámara y el tablero no se muevan, y un
+# OcclusionGate para descartar los fotogramas con una mano o una pieza a medio mover.
+
+
+def cell_signatures(cells, size=16):
+    """
+    Firma de cada casilla para detectar cambios: gris, reducida a size x size con INTER_AREA
+    (promedia el ruido del sensor y pequeñas vibraciones). Devuelve (n, size, size) float32.
+    """
+    signatures = [cv2.resize(cv2.cvtColor(cell, cv2.COLOR_BGR2GRAY), (size, size), interpolation=cv2.INTER_AREA)
+                  for cell in cells]
+    return np.array(signatures, np.float32)
+
+
+class Session:
+    """Todo lo que se guarda de una sesión; se crea y se descarta entero."""
+
+    def __init__(self, threshold):
+        self.signatures = None  # Firmas de las casillas cuando se clasificaron (None: aún no se ha clasificado)
+        self.labels = None
+        self.tracker = BoardTracker()
+        self.gate = OcclusionGate(threshold=threshold)
+        self.last_used = time.time()
+
+
+class BoardSessions:
+    """
+    Estado por sesión: firma y etiqueta de las 64 casillas en el momento en que se clasificaron,
+    el BoardTracker y el OcclusionGate. Las sesiones viven en memoria de la instancia (LRU con
+    caducidad) y se descartan enteras; si una petición llega a otra instancia o la sesión ha
+    caducado, simplemente se clasifica el tablero completo.
+    """
+
+    def __init__(self, max_sessions=100, ttl=600, threshold=8.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.threshold = threshold
+        self.sessions = OrderedDict()  # session_id -> Session, de la menos a la más recientemente usada
+        self.lock = threading.Lock()
+
+    def _expired(self, session, now):
+        return now - session.last_used > self.ttl
+
+    def _get(self, session_id):
+        """Sesión (se crea si no existe o ha caducado), marcada como usada. Llamar con self.lock."""
+        now = time.time()
+        # Las caducadas están al principio: se descartan aunque nadie vuelva a pedirlas
+        while self.sessions:
+            old_id, old = next(iter(self.sessions.items()))
+            if not self._expired(old, now):
+                break
+            del self.sessions[old_id]
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(self.threshold)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        session.last_used = now
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def predict(self, session_id, cells, classify, signatures=None):
+        """
+        Devuelve las 64 etiquetas del tablero y los índices de las casillas que se han reclasificado.
+        :param cells: lista de 64 casillas (BGR)
+        :param classify: función que recibe una lista de casillas y devuelve sus etiquetas
+        :param signatures: firmas ya calculadas de las casillas (cell_signatures), si las hay
+        """
+        if signatures is None:
+            signatures = cell_signatures(cells)
+        with self.lock:
+            session = self._get(session_id)
+            previous = session.signatures, session.labels
+
+        if previous[0] is None:
+            changed = np.arange(len(cells))
+            stored_signatures, labels = signatures.copy(), [None] * len(cells)
+        else:
+            # Casillas cuya diferencia media con la firma guardada supera el umbral. Solo se actualiza
+            # la firma de las reclasificadas, así un cambio lento (luz que varía poco a poco) acaba
+            # superando el umbral en lugar de pasar desapercibido
+            diff = np.abs(signatures - previous[0]).mean(axis=(1, 2))
+            changed = np.flatnonzero(diff > self.threshold)
+            stored_signatures, labels = previous[0].copy(), list(previous[1])
+
+        if len(changed):
+            for i, label in zip(changed, classify([cells[i] for i in changed])):
+                labels[i] = label
+            stored_signatures[changed] = signatures[changed]
+
+        with self.lock:
+            session.signatures, session.labels = stored_signatures, labels
+        return labels, changed
+
+    def tracker(self, session_id):
+        """BoardTracker de la sesión (se crea la primera vez)."""
+        with self.lock:
+            return self._get(session_id).tracker
+
+    def gate(self, session_id):
+        """OcclusionGate de la sesión (se crea la primera vez), con el mismo umbral de cambio por casilla."""
+        with self.lock:
+            return self._get(session_id).gate
+
+    def reset(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
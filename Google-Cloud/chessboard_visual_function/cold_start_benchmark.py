@@ -0,0 +1,81 @@
+"""
+Mide la latencia de la primera petición a predict_chessboard con y sin warm-up al importar main.py.
+Cada modo se ejecuta en un proceso nuevo para simular el arranque en frío de la Cloud Function.
+
+Uso:
+    python cold_start_benchmark.py --image ../chessboard_model/img/board1.jpeg
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def run_child(image_path, n_requests):
+    """Importa main.py, lanza n_requests peticiones y devuelve los tiempos medidos (en segundos)."""
+    from flask import Flask
+
+    start = time.perf_counter()
+    import main
+    import_seconds = time.perf_counter() - start
+
+    app = Flask(__name__)
+    request_seconds = []
+    for _ in range(n_requests):
+        with open(image_path, 'rb') as f:
+            with app.test_request_context(method='POST', content_type='multipart/form-data',
+                                          data={'file': (f, os.path.basename(image_path))}):
+                from flask import request
+                start = time.perf_counter()
+                _, status, _ = main.predict_chessboard(request)
+                request_seconds.append(time.perf_counter() - start)
+                if status != 200:
+                    raise RuntimeError(f"La petición devolvió {status}")
+
+    return {
+        'import': import_seconds,
+        'warmup': main.warmup_seconds,
+        'requests': request_seconds,
+    }
+
+
+def run_mode(image_path, n_requests, warmup):
+    """Ejecuta run_child en un proceso nuevo con WARMUP_ON_IMPORT activado o desactivado."""
+    env = dict(os.environ, WARMUP_ON_IMPORT='1' if warmup else '0')
+    cmd = [sys.executable, __file__, '--child', '--image', image_path, '--requests', str(n_requests)]
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    # La última línea es el JSON con los tiempos; lo anterior son logs de TensorFlow
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image', type=str, required=True, help='Imagen de tablero para las peticiones')
+    parser.add_argument('--requests', type=int, default=3, help='Peticiones por proceso')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    image_path = os.path.abspath(args.image)
+
+    if args.child:
+        print(json.dumps(run_child(image_path, args.requests)))
+        return
+
+    results = {
+        'frío': run_mode(image_path, args.requests, warmup=False),
+        'warm-up': run_mode(image_path, args.requests, warmup=True),
+    }
+    for name, r in results.items():
+        warmup = f"{r['warmup']:.2f} s" if r['warmup'] is not None else "-"
+        rest = ', '.join(f"{t:.2f}" for t in r['requests'][1:])
+        print(f"[{name}] import: {r['import']:.2f} s | warm-up: {warmup} | "
+              f"primera petición: {r['requests'][0]:.2f} s | siguientes: {rest} s")
+
+    gap = results['frío']['requests'][0] - results['warm-up']['requests'][0]
+    print(f"Diferencia en la primera petición: {gap:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from functools import lru_cache
 
 # =============================================================================
 # CONFIGURACIÓN
@@ -7,7 +8,11 @@ import numpy as np
 
 GREEN_CORNERS_HSV = [[[35, 50, 50], [85, 255, 255]]]  # Rangos de color verde
 MIN_CONTOUR_AREA = 0  # Área mínima para detección de esquinas
+CELL_SIZE = 64  # Lado de casilla que recibe el clasificador; el warp genera directamente este tamaño
+WARP_INTERPOLATION = cv2.INTER_LINEAR  # Interpolación de warpPerspective
+WARP_PRE_PYRAMID = False  # Si True, reduce con INTER_AREA la zona del tablero antes del warp (antialiasing)
 MASK = GREEN_CORNERS_HSV
+MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (25, 25))  # Kernel para cierre/apertura de la máscara
 
 # =============================================================================
 # FUNCIONES DE PROCESAMIENTO
@@ -28,9 +33,8 @@ def create_mask(hsv_img):
     
     mask = cv2.inRange(hsv_img, lower_green, upper_green)
     
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (25,25))
-    closed_mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    final_mask = cv2.morphologyEx(closed_mask, cv2.MORPH_OPEN, kernel)
+    closed_mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, MORPH_KERNEL)
+    final_mask = cv2.morphologyEx(closed_mask, cv2.MORPH_OPEN, MORPH_KERNEL)
     
     return final_mask
 
@@ -67,12 +71,46 @@ def order_corners(corners):
     return np.array(ordered[:4], dtype=np.float32)
 
 
-def transform_board(img, corners):
-    """Aplica transformación de perspectiva al tablero"""
-    side = max(img.shape[:2])
+def board_side(margin_pct, cell_size=CELL_SIZE):
+    """Lado del tablero enderezado para que, tras recortar margin_pct por borde, cada casilla mida cell_size."""
+    return int(np.ceil(8 * cell_size / (1 - 2 * margin_pct)))
+
+
+def pyramid_down_board(img, corners, side):
+    """
+    Recorta la zona del tablero y la reduce con INTER_AREA hasta que su lado más largo mida
+    aproximadamente side, para que el warp posterior no tenga que saltarse píxeles (aliasing).
+    Devuelve la imagen reducida y las esquinas en sus coordenadas.
+    """
+    edge = np.linalg.norm(np.roll(corners, -1, axis=0) - corners, axis=1).max()
+    scale = side / edge
+    if scale >= 1:
+        return img, corners
+    h, w = img.shape[:2]
+    x1, y1 = np.maximum(np.floor(corners.min(axis=0)).astype(int) - 2, 0)
+    x2, y2 = np.minimum(np.ceil(corners.max(axis=0)).astype(int) + 3, [w, h])
+    crop = img[y1:y2, x1:x2]
+    small = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    # Conversión de coordenadas teniendo en cuenta que resize alinea los centros de los píxeles
+    ratio = np.array([small.shape[1] / crop.shape[1], small.shape[0] / crop.shape[0]], np.float32)
+    return small, ((corners - [x1, y1] + 0.5) * ratio - 0.5).astype(np.float32)
+
+
+def transform_board(img, corners, side=None, interpolation=None, pre_pyramid=None):
+    """
+    Aplica transformación de perspectiva al tablero.
+    :param side: Lado del cuadrado de salida (por defecto max(img.shape[:2]); detect_and_crop_board
+                 usa board_side para generar directamente casillas de CELL_SIZE)
+    :param interpolation: Interpolación del warp (por defecto WARP_INTERPOLATION)
+    :param pre_pyramid: Si True, reduce antes la zona del tablero con INTER_AREA (por defecto WARP_PRE_PYRAMID)
+    """
+    side = side or max(img.shape[:2])
+    interpolation = WARP_INTERPOLATION if interpolation is None else interpolation
+    if WARP_PRE_PYRAMID if pre_pyramid is None else pre_pyramid:
+        img, corners = pyramid_down_board(img, corners, side)
     dst_pts = np.array([[0,0], [side,0], [side,side], [0,side]], dtype=np.float32)
     M = cv2.getPerspectiveTransform(corners, dst_pts)
-    warped = cv2.warpPerspective(img, M, (side, side))
+    warped = cv2.warpPerspective(img, M, (side, side), flags=interpolation)
     return warped
 
 
@@ -120,14 +158,140 @@ def divide_board(board_img):
     return board_with_grid, cells
 
 
-def crop_and_divide_board(img, margin_pct=0.08, debug=False):
+# =============================================================================
+# DETECCIÓN RÁPIDA Y SEGUIMIENTO ENTRE FOTOGRAMAS
+# =============================================================================
+
+DETECT_MAX_SIDE = 800  # Lado mayor de la imagen reducida en la que se buscan las esquinas
+FAST_KERNEL_FACTOR = 0.6  # En la imagen reducida un kernel proporcional llega a borrar las manchas pequeñas
+REFINE_RADIUS = 12     # Radio (en píxeles de la imagen reducida) de la ventana de refinado
+PATCH_RADIUS = 16      # Radio (en píxeles de la imagen reducida) de los parches de comprobación
+PATCH_THRESHOLD = 12.0  # Diferencia media de gris a partir de la cual se considera que el tablero se ha movido
+
+
+@lru_cache(maxsize=None)
+def morph_kernel(size):
+    """Kernel elíptico de cierre/apertura para la máscara (tamaño impar, mínimo 3)."""
+    size = max(3, int(round(size)) | 1)
+    return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size))
+
+
+def refine_corner(img, point, radius):
     """
-    Detecta el tablero, corrige perspectiva, recorta y divide en 64 casillas.
+    Recalcula una esquina a resolución completa: centroide de la mancha verde más grande en una
+    ventana de lado 2 * radius alrededor de la estimación. Si no encuentra nada devuelve point.
+    """
+    h, w = img.shape[:2]
+    x, y = int(round(point[0])), int(round(point[1]))
+    x1, y1 = max(0, x - radius), max(0, y - radius)
+    x2, y2 = min(w, x + radius + 1), min(h, y + radius + 1)
+    patch = cv2.cvtColor(cv2.GaussianBlur(img[y1:y2, x1:x2], (7, 7), 0), cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(patch, np.array(MASK[0][0]), np.array(MASK[0][1]))
+    n, labels, stats, centroids = cv2.connectedComponentsWithStats(mask)
+    if n < 2:
+        return np.asarray(point, np.float32)
+    largest = 1 + np.argmax(stats[1:, cv2.CC_STAT_AREA])
+    return np.array([x1 + centroids[largest][0], y1 + centroids[largest][1]], np.float32)
+
+
+def find_corners_fast(img, max_side=DETECT_MAX_SIDE):
+    """
+    Busca las esquinas verdes en una copia reducida de la imagen (lado mayor max_side, con el kernel
+    de morfología escalado en proporción) y refina cada una en una ventana pequeña a resolución completa.
+    :return: Esquinas ordenadas (4, 2) en coordenadas de img, o None si no hay 4
+    """
+    scale = min(1.0, max_side / max(img.shape[:2]))
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else img
+
+    hsv = preprocess_image(small)
+    mask = cv2.inRange(hsv, np.array(MASK[0][0]), np.array(MASK[0][1]))
+    kernel = morph_kernel(MORPH_KERNEL.shape[0] * scale * FAST_KERNEL_FACTOR)
+    mask = cv2.morphologyEx(cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel), cv2.MORPH_OPEN, kernel)
+    ordered = order_corners(find_corners(small, mask))
+    if ordered is None:
+        return None
+
+    radius = int(np.ceil(REFINE_RADIUS / scale))
+    return np.array([refine_corner(img, p / scale, radius) for p in ordered], np.float32)
+
+
+class BoardTracker:
+    """
+    Recuerda las esquinas del último fotograma para una cámara fija. Mientras los parches
+    alrededor de cada esquina no cambien, reutiliza las esquinas (y la homografía) sin volver a
+    detectarlas; si el tablero o la cámara se mueven, detecta de nuevo con find_corners_fast.
+    """
+
+    def __init__(self, max_side=DETECT_MAX_SIDE, threshold=PATCH_THRESHOLD):
+        self.max_side = max_side
+        self.threshold = threshold
+        self.corners = None
+        self.patches = None
+        self.homographies = {}  # (lado, margen) -> matriz de perspectiva para esas esquinas
+        self.detections = 0
+        self.reuses = 0
+
+    def _patches(self, img, corners):
+        # Parches en gris alrededor de cada esquina, reducidos a la escala de detección
+        scale = min(1.0, self.max_side / max(img.shape[:2]))
+        radius = int(np.ceil(PATCH_RADIUS / scale))
+        size = 2 * PATCH_RADIUS
+        h, w = img.shape[:2]
+        patches = []
+        for x, y in corners.astype(int):
+            x1, y1 = min(max(0, x - radius), w - 2 * radius), min(max(0, y - radius), h - 2 * radius)
+            patch = cv2.cvtColor(img[y1:y1 + 2 * radius, x1:x1 + 2 * radius], cv2.COLOR_BGR2GRAY)
+            patches.append(cv2.resize(patch, (size, size), interpolation=cv2.INTER_AREA))
+        return np.array(patches, np.float32)
+
+    def board_moved(self, img):
+        """True si no hay esquinas guardadas o si algún parche de esquina ha cambiado."""
+        if self.corners is None or self.patches.shape[0] != 4:
+            return True
+        diff = np.abs(self._patches(img, self.corners) - self.patches).mean(axis=(1, 2))
+        return bool(np.any(diff > self.threshold))
+
+    def find_corners(self, img):
+        """Esquinas ordenadas del tablero en img, reutilizando las anteriores si no se ha movido."""
+        if not self.board_moved(img):
+            self.reuses += 1
+            return self.corners
+        corners = find_corners_fast(img, self.max_side)
+        if corners is None:
+            self.corners = None
+            raise ValueError("No se detectaron suficientes esquinas verdes (se necesitan 4)")
+        self.corners = corners
+        self.patches = self._patches(img, corners)
+        self.homographies = {}
+        self.detections += 1
+        return corners
+
+    def homography(self, side):
+        """Matriz de perspectiva de las esquinas actuales a un cuadrado de lado side (se guarda por lado)."""
+        if side not in self.homographies:
+            dst_pts = np.array([[0, 0], [side, 0], [side, side], [0, side]], dtype=np.float32)
+            self.homographies[side] = cv2.getPerspectiveTransform(self.corners, dst_pts)
+        return self.homographies[side]
+
+
+def detect_and_crop_board(img, margin_pct=0.08, tracker=None):
+    """
+    Detecta el tablero, corrige perspectiva y recorta el margen, sin dividirlo en casillas.
     :param img: Imagen de entrada (numpy array, BGR)
     :param margin_pct: Porcentaje de recorte en cada borde (ej: 0.08 para 8%)
-    :param debug: Si True, muestra la primera casilla extraída
-    :return: Lista de 64 imágenes (casillas)
+    :param tracker: BoardTracker opcional para vídeo/cámara fija: detecta en una imagen reducida y
+                    reutiliza las esquinas y la homografía mientras el tablero no se mueva
+    :return: Imagen del tablero recortado
     """
+    if tracker is not None:
+        corners = tracker.find_corners(img)
+        side = board_side(margin_pct)
+        if WARP_PRE_PYRAMID:
+            warped = transform_board(img, corners, side=side)
+        else:
+            warped = cv2.warpPerspective(img, tracker.homography(side), (side, side), flags=WARP_INTERPOLATION)
+        return crop_board(warped, margin_pct)
+
     hsv_img = preprocess_image(img)
     mask = create_mask(hsv_img)
     corners = find_corners(img, mask)
@@ -136,8 +300,20 @@ def crop_and_divide_board(img, margin_pct=0.08, debug=False):
     if ordered_corners is None:
         raise ValueError("No se detectaron suficientes esquinas verdes (se necesitan 4)")
 
-    warped = transform_board(img, ordered_corners)
-    board = crop_board(warped, margin_pct)
+    warped = transform_board(img, ordered_corners, side=board_side(margin_pct))
+    return crop_board(warped, margin_pct)
+
+
+def crop_and_divide_board(img, margin_pct=0.08, debug=False, tracker=None):
+    """
+    Detecta el tablero, corrige perspectiva, recorta y divide en 64 casillas.
+    :param img: Imagen de entrada (numpy array, BGR)
+    :param margin_pct: Porcentaje de recorte en cada borde (ej: 0.08 para 8%)
+    :param debug: Si True, muestra la primera casilla extraída
+    :param tracker: BoardTracker opcional (ver detect_and_crop_board)
+    :return: Lista de 64 imágenes (casillas)
+    """
+    board = detect_and_crop_board(img, margin_pct, tracker=tracker)
     _, cells = divide_board(board)
 
     return cells
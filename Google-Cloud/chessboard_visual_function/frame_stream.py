@@ -0,0 +1,134 @@
+import numpy as np
+
+# =============================================================================
+# LECTURA DE FLUJOS DE FOTOGRAMAS
+# =============================================================================
+# El endpoint predict_stream recibe un cuerpo troceado (chunked) con JPEGs seguidos: un MJPEG
+# (multipart/x-mixed-replace) o simplemente JPEGs concatenados. Cada fotograma empieza en el
+# marcador de inicio (FFD8) y su final se busca recorriendo los segmentos del JPEG por su campo
+# de longitud: no basta con buscar el primer FFD9, porque un segmento APPn (p. ej. EXIF, que
+# escriben casi todas las cámaras y móviles) puede llevar dentro una miniatura JPEG completa.
+# Dentro de los datos comprimidos los marcadores no aparecen gracias al byte stuffing (FF00),
+# así que da igual el formato del contenedor.
+
+JPEG_START = b'\xff\xd8'
+JPEG_END = b'\xff\xd9'
+
+
+def find_jpeg_end(buffer, pos=2, in_scan=False):
+    """
+    Busca el final del JPEG que empieza en buffer[0] saltando los segmentos por su longitud.
+    Devuelve (fin, pos, in_scan): fin es la posición justo después de FFD9, o None si aún faltan
+    datos; en ese caso pos e in_scan sirven para seguir desde ahí cuando lleguen más datos.
+    Lanza ValueError si los datos no tienen la estructura de un JPEG.
+    """
+    n = len(buffer)
+    while True:
+        if in_scan:
+            # Datos comprimidos: FF00 es un FF de los datos y FFD0-FFD7 son reinicios; otro FFxx es un marcador
+            i = buffer.find(b'\xff', pos)
+            while 0 <= i < n - 1 and (buffer[i + 1] == 0 or 0xD0 <= buffer[i + 1] <= 0xD7):
+                i = buffer.find(b'\xff', i + 2)
+            if i < 0:
+                return None, max(pos, n), True
+            if i == n - 1:
+                return None, i, True
+            pos, in_scan = i, False
+
+        if pos >= n:
+            return None, pos, False
+        if buffer[pos] != 0xFF:
+            raise ValueError("Marcador JPEG no válido")
+        j = pos
+        while j < n and buffer[j] == 0xFF:  # Bytes de relleno antes del marcador
+            j += 1
+        if j >= n:
+            return None, pos, False
+        marker = buffer[j]
+        if marker == 0xD9:
+            return j + 1, j + 1, False
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos = j + 1  # Marcadores sin segmento
+            continue
+        if marker in (0x00, 0xD8):
+            raise ValueError("Marcador JPEG no válido")
+        if j + 2 >= n:
+            return None, pos, False
+        length = (buffer[j + 1] << 8) | buffer[j + 2]
+        if length < 2:
+            raise ValueError("Longitud de segmento JPEG no válida")
+        pos = j + 1 + length
+        in_scan = marker == 0xDA  # Tras la cabecera de SOS vienen los datos comprimidos
+
+
+def iter_jpeg_frames(stream, chunk_size=64 * 1024, max_frame_bytes=16 * 1024 * 1024):
+    """
+    Generador de fotogramas JPEG (bytes) a medida que llegan por stream (objeto con read()).
+    Los fotogramas de más de max_frame_bytes o mal formados se descartan.
+    """
+    buffer = bytearray()
+    state = None  # (pos, in_scan) del fotograma en curso, para no volver a recorrerlo entero
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        while True:
+            if state is None:
+                start = buffer.find(JPEG_START)
+                if start < 0:
+                    # Se guarda el último byte por si el marcador ha quedado partido entre dos trozos
+                    del buffer[:-1]
+                    break
+                del buffer[:start]
+                state = (2, False)
+            try:
+                end, pos, in_scan = find_jpeg_end(buffer, *state)
+            except ValueError:
+                # Fotograma corrupto: se salta su SOI y se busca el siguiente
+                del buffer[:2]
+                state = None
+                continue
+            if end is None:
+                state = (pos, in_scan)
+                if len(buffer) > max_frame_bytes:
+                    buffer.clear()
+                    state = None
+                break
+            yield bytes(buffer[:end])
+            del buffer[:end]
+            state = None
+
+
+class BoardStabilizer:
+    """
+    Detecta cuándo el tablero está quieto: compara las firmas de las casillas de cada fotograma
+    muestreado con las del anterior y avisa una sola vez cuando llevan stable_frames fotogramas
+    seguidos sin cambios (mano fuera, pieza ya soltada). Cualquier cambio reinicia la cuenta.
+    """
+
+    def __init__(self, stable_frames=3, threshold=6.0):
+        self.stable_frames = stable_frames
+        self.threshold = threshold
+        self.last = None
+        self.count = 0
+        self.reported = False
+
+    def reset(self):
+        """Fotograma inválido (sin tablero): la posición deja de considerarse estable."""
+        self.last = None
+        self.count = 0
+        self.reported = False
+
+    def update(self, signatures):
+        """Devuelve True solo en el fotograma en el que la posición pasa a ser estable."""
+        if self.last is not None and np.abs(signatures - self.last).mean(axis=(1, 2)).max() <= self.threshold:
+            self.count += 1
+        else:
+            self.count = 1
+            self.reported = False
+        self.last = signatures
+        if self.count >= self.stable_frames and not self.reported:
+            self.reported = True
+            return True
+        return False
@@ -1,30 +1,69 @@
+import json
 import os
-import tempfile
+import time
+import uuid
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
-from flask import jsonify
-from prediction import predict_board_position_all_filters_rotations
+from flask import Response, jsonify, stream_with_context
+from aply_filters import all_filters_and_rotations_batch
+from board_session import BoardSessions, cell_signatures
+from crop_board import crop_and_divide_board
+from frame_stream import BoardStabilizer, iter_jpeg_frames
+from inference_backend import load_backend
+from prediction import predict_board_position_all_filters_rotations, predict_cells_all_filters_rotations
 
-MODEL_PATH = 'my_model.h5'
+MODEL_PATH = os.environ.get('MODEL_PATH', 'my_model.h5')  # .h5, .tflite o .onnx
+WARMUP_ON_IMPORT = os.environ.get('WARMUP_ON_IMPORT', '1') == '1'
 model = None
+warmup_seconds = None
+
+# Modo sesión (modo grabar): solo se reclasifican las casillas que cambian entre fotogramas
+sessions = BoardSessions(
+    max_sessions=int(os.environ.get('SESSION_MAX', '100')),
+    ttl=float(os.environ.get('SESSION_TTL', '600')),
+    threshold=float(os.environ.get('CELL_DIFF_THRESHOLD', '8')),
+)
+
+# Modo vídeo (predict_stream): se analiza 1 de cada STREAM_SAMPLE_EVERY fotogramas y se emite el
+# tablero cuando lleva STREAM_STABLE_FRAMES fotogramas analizados sin cambios
+STREAM_SAMPLE_EVERY = int(os.environ.get('STREAM_SAMPLE_EVERY', '5'))
+STREAM_STABLE_FRAMES = int(os.environ.get('STREAM_STABLE_FRAMES', '3'))
+STREAM_STABLE_THRESHOLD = float(os.environ.get('STREAM_STABLE_THRESHOLD', '6'))
 
 def get_model():
     global model
     if model is None:
-        model = load_model(MODEL_PATH)
+        model = load_backend(MODEL_PATH)
     return model
 
+def warm_up():
+    """
+    Carga el modelo y ejecuta un lote ficticio con la misma forma que una petición real
+    (64 casillas x todas sus augmentaciones), para que el primer usuario tras escalar
+    no pague la carga del modelo ni el trazado del grafo de TensorFlow.
+    Devuelve el tiempo de calentamiento en segundos.
+    """
+    start = time.perf_counter()
+    model = get_model()
+    # Pasa también por los filtros para inicializar OpenCV con el tamaño real de casilla
+    cells = [np.zeros((64, 64, 3), dtype=np.uint8)] * 64
+    dummy = all_filters_and_rotations_batch(cells).reshape(-1, 64, 64, 3).astype(np.float32) / 255.0
+    model.predict(dummy, batch_size=256, verbose=0)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] Warm-up completado en {elapsed:.2f} s")
+    return elapsed
+
+if WARMUP_ON_IMPORT:
+    warmup_seconds = warm_up()
+
 def parse_image(request):
     if 'file' not in request.files:
         return None, "No file part"
     file = request.files['file']
     if file.filename == '':
         return None, "No selected file"
-    temp = tempfile.NamedTemporaryFile(delete=False)
-    file.save(temp.name)
-    img = cv2.imread(temp.name)
-    os.unlink(temp.name)
+    # Se decodifica directamente desde memoria, sin pasar por un archivo temporal
+    img = cv2.imdecode(np.frombuffer(file.read(), np.uint8), cv2.IMREAD_COLOR)
     if img is None:
         return None, "Cannot read image"
     return img, None
@@ -51,8 +90,102 @@ def predict_chessboard(request):
         return jsonify({'error': error}), 400, headers
 
     model = get_model()
-    labels = predict_board_position_all_filters_rotations(img, model, margin_pct=0.05)
-    board = [labels[i*8:(i+1)*8] for i in range(8)]
+    session_id = request.form.get('session_id')
+    response = {}
+    if session_id:
+        cells = crop_and_divide_board(img, margin_pct=0.05, debug=False, tracker=sessions.tracker(session_id))
+        # Con una mano encima o una pieza a medio mover no se gasta la CNN: el cliente conserva su tablero
+        signatures = cell_signatures(cells)
+        reason = sessions.gate(session_id).check(cells, signatures)
+        if reason:
+            headers = {'Access-Control-Allow-Origin': '*'}
+            return jsonify({'descartado': reason}), 200, headers
+        labels, changed = sessions.predict(session_id, cells,
+                                           lambda subset: predict_cells_all_filters_rotations(subset, model),
+                                           signatures)
+        response['reclasificadas'] = [int(i) for i in changed]
+    else:
+        labels = predict_board_position_all_filters_rotations(img, model, margin_pct=0.05)
+    response['board'] = [labels[i*8:(i+1)*8] for i in range(8)]
+
+    headers = {'Access-Control-Allow-Origin': '*'}
+    return jsonify(response), 200, headers
+
+def predict_stream(request):
+    """
+    Recibe un flujo troceado de fotogramas JPEG (MJPEG multipart/x-mixed-replace o JPEGs
+    concatenados, ver stream_client.py) y devuelve, en NDJSON y a medida que ocurren, solo los
+    tableros nuevos que se mantienen estables. Cada fotograma muestreado pasa por la detección con
+    seguimiento de esquinas y el filtro de manos y movimiento (OcclusionGate); cuando la posición
+    se estabiliza se clasifican solo las casillas que han cambiado respecto al último tablero emitido.
+    Parámetros opcionales en la URL: sample_every, session_id.
+    """
+    # --- CORS preflight ---
+    if request.method == 'OPTIONS':
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'POST, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Max-Age': '3600'
+        }
+        return ('', 204, headers)
+    # --- Fin CORS preflight ---
+
+    if request.method != 'POST':
+        headers = {'Access-Control-Allow-Origin': '*'}
+        return jsonify({'error': 'Use POST'}), 405, headers
+
+    try:
+        sample_every = int(request.args.get('sample_every', STREAM_SAMPLE_EVERY))
+    except ValueError:
+        sample_every = 0
+    if sample_every < 1:
+        headers = {'Access-Control-Allow-Origin': '*'}
+        return jsonify({'error': 'sample_every debe ser un entero positivo'}), 400, headers
+
+    model = get_model()
+    session_id = request.args.get('session_id')
+    temporary_session = session_id is None
+    if temporary_session:
+        session_id = f"stream-{uuid.uuid4()}"
+    stream = request.stream
+
+    def generate():
+        stabilizer = BoardStabilizer(STREAM_STABLE_FRAMES, STREAM_STABLE_THRESHOLD)
+        tracker = sessions.tracker(session_id)
+        gate = sessions.gate(session_id)
+        last_board = None
+        # La sesión temporal se borra también si el cliente corta la conexión (GeneratorExit)
+        try:
+            for n_frame, data in enumerate(iter_jpeg_frames(stream)):
+                if n_frame % sample_every:
+                    continue
+                img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if img is None:
+                    continue
+                try:
+                    cells = crop_and_divide_board(img, margin_pct=0.05, debug=False, tracker=tracker)
+                except ValueError:
+                    stabilizer.reset()
+                    continue
+                signatures = cell_signatures(cells)
+                if gate.check(cells, signatures):
+                    stabilizer.reset()
+                    continue
+                if not stabilizer.update(signatures):
+                    continue
+
+                labels, changed = sessions.predict(session_id, cells,
+                                                   lambda subset: predict_cells_all_filters_rotations(subset, model),
+                                                   signatures)
+                board = [labels[i*8:(i+1)*8] for i in range(8)]
+                if board != last_board:
+                    last_board = board
+                    yield json.dumps({'frame': n_frame, 'board': board,
+                                      'reclasificadas': [int(i) for i in changed]}) + '\n'
+        finally:
+            if temporary_session:
+                sessions.reset(session_id)
 
     headers = {'Access-Control-Allow-Origin': '*'}
-    return jsonify({'board': board}), 200, headers
+    return Response(stream_with_context(generate()), 200, headers, mimetype='application/x-ndjson')
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+# =============================================================================
+# FILTRO DE FOTOGRAMAS CON MANO O MOVIMIENTO
+# =============================================================================
+# Antes de gastar la CNN (64 casillas x todas las augmentaciones) se descartan los fotogramas
+# en los que el tablero no está quieto: una mano tapando casillas o una pieza a medio mover.
+# Se usan dos pruebas baratas sobre las casillas ya recortadas por crop_and_divide_board:
+#   - Diferencia de fotogramas: firmas de cada casilla comparadas con el último fotograma
+#     aceptado y con el fotograma anterior. Una jugada cambia como mucho 4 casillas (enroque);
+#     si cambian más, solo se acepta cuando el fotograma anterior ya mostraba lo mismo.
+#   - Piel: fracción de píxeles de cada casilla dentro del rango de piel en YCrCb, comparada
+#     con la del último fotograma aceptado para no confundir un tablero o piezas de madera
+#     con una mano.
+
+# Rango de piel en YCrCb (Chai y Ngan)
+SKIN_LOWER = np.array([0, 133, 77], np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], np.uint8)
+
+
+def skin_fraction(cells, size=16):
+    """Fracción de píxeles con color de piel de cada casilla (reducida a size x size). Devuelve (n,) float32."""
+    thumbs = np.concatenate([cv2.resize(cell, (size, size), interpolation=cv2.INTER_AREA) for cell in cells])
+    mask = cv2.inRange(cv2.cvtColor(thumbs, cv2.COLOR_BGR2YCrCb), SKIN_LOWER, SKIN_UPPER)
+    return mask.reshape(len(cells), -1).mean(axis=1).astype(np.float32) / 255.0
+
+
+class OcclusionGate:
+    """
+    Decide si un fotograma muestra una posición asentada. Guarda las firmas y la piel del último
+    fotograma aceptado (referencia) y las firmas del último fotograma visto.
+    """
+
+    def __init__(self, threshold=8.0, max_changed=4, skin_threshold=0.35, skin_cells=3):
+        self.threshold = threshold  # Diferencia media (niveles de gris) para considerar que una casilla cambió
+        self.max_changed = max_changed  # Casillas que puede cambiar una jugada
+        self.skin_threshold = skin_threshold  # Fracción de piel a partir de la que una casilla está tapada
+        self.skin_cells = skin_cells  # Casillas tapadas para considerar que hay una mano
+        self.reference = None  # (firmas, piel) del último fotograma aceptado
+        self.previous = None  # Firmas del último fotograma visto
+
+    def reset(self):
+        self.reference = None
+        self.previous = None
+
+    def _changed(self, signatures, other):
+        if other is None:
+            return len(signatures)
+        return int((np.abs(signatures - other).mean(axis=(1, 2)) > self.threshold).sum())
+
+    def check(self, cells, signatures):
+        """
+        Devuelve None si el fotograma se puede clasificar, o el motivo ('mano' / 'movimiento') si se descarta.
+        :param cells: lista de casillas (BGR)
+        :param signatures: firmas de las casillas (cell_signatures)
+        """
+        skin = skin_fraction(cells)
+        changed_previous = self._changed(signatures, self.previous)
+        self.previous = signatures
+
+        if self.reference is None:
+            # Sin referencia solo se mira la piel en valor absoluto. Si casi medio tablero parece piel
+            # es el material del tablero o de las piezas, no una mano
+            covered = skin > self.skin_threshold
+            if self.skin_cells <= covered.sum() < len(cells) * 0.4:
+                return 'mano'
+        else:
+            ref_signatures, ref_skin = self.reference
+            if ((skin - ref_skin) > self.skin_threshold).sum() >= self.skin_cells:
+                return 'mano'
+            # Un cambio grande solo se acepta si el fotograma anterior era igual (cámara movida, tablero recolocado)
+            if self._changed(signatures, ref_signatures) > self.max_changed and changed_previous:
+                return 'movimiento'
+
+        self.reference = (signatures, skin)
+        return None
@@ -0,0 +1,104 @@
+"""
+Cliente local para probar predict_stream: manda fotogramas de la webcam, de un vídeo o de una lista
+de imágenes como un MJPEG troceado (chunked) e imprime los tableros estables que devuelve la función.
+
+Arrancar la función en local:
+    functions-framework --target predict_stream --port 8080
+
+Y en otra terminal:
+    python stream_client.py --source 0                                  # webcam
+    python stream_client.py --source partida.mp4
+    python stream_client.py --images ../chessboard_model/img/board1.jpeg ../chessboard_model/img/board2.jpeg --repeat 20
+"""
+import argparse
+import http.client
+import json
+import time
+import urllib.parse
+import cv2
+
+BOUNDARY = 'frame'
+
+
+def camera_frames(source, max_frames=None):
+    """Fotogramas de una cámara (índice) o de un archivo de vídeo."""
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    n = 0
+    try:
+        while max_frames is None or n < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            n += 1
+            yield frame
+    finally:
+        cap.release()
+
+
+def image_frames(paths, repeat):
+    """Cada imagen repetida repeat veces seguidas, como si la cámara viera esa posición un rato."""
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            print(f"No se pudo leer {path}")
+            continue
+        for _ in range(repeat):
+            yield img
+
+
+def mjpeg_chunks(frames, fps, quality=85):
+    """Codifica cada fotograma en JPEG y lo envuelve como parte de un multipart/x-mixed-replace."""
+    for frame in frames:
+        ok, jpg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            continue
+        yield (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpg)}\r\n\r\n").encode()
+        yield jpg.tobytes() + b"\r\n"
+        if fps:
+            time.sleep(1 / fps)
+
+
+def stream(url, frames, fps, sample_every=None):
+    """Envía el flujo con transferencia troceada e imprime cada línea NDJSON de la respuesta."""
+    parsed = urllib.parse.urlsplit(url)
+    query = dict(urllib.parse.parse_qsl(parsed.query))
+    if sample_every:
+        query['sample_every'] = sample_every
+    path = (parsed.path or '/') + ('?' + urllib.parse.urlencode(query) if query else '')
+    connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(parsed.netloc)
+    conn.request('POST', path, body=mjpeg_chunks(frames, fps), encode_chunked=True,
+                 headers={'Content-Type': f'multipart/x-mixed-replace; boundary={BOUNDARY}',
+                          'Transfer-Encoding': 'chunked'})
+    response = conn.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"La función devolvió {response.status}: {response.read()[:200]}")
+    for line in response:
+        if line.strip():
+            data = json.loads(line)
+            print(f"[fotograma {data['frame']}] casillas reclasificadas: {len(data['reclasificadas'])}")
+            for row in data['board']:
+                print('  ' + ' '.join(row))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', type=str, default='http://localhost:8080', help='URL de predict_stream')
+    parser.add_argument('--source', type=str, default=None, help='Índice de cámara o archivo de vídeo')
+    parser.add_argument('--images', nargs='+', default=None, help='Imágenes a enviar en lugar de vídeo')
+    parser.add_argument('--repeat', type=int, default=20, help='Veces que se repite cada imagen')
+    parser.add_argument('--fps', type=float, default=10, help='Fotogramas por segundo enviados (0 = sin pausa)')
+    parser.add_argument('--max_frames', type=int, default=None, help='Máximo de fotogramas de cámara/vídeo')
+    parser.add_argument('--sample_every', type=int, default=None, help='Analizar 1 de cada N fotogramas')
+    args = parser.parse_args()
+
+    if args.images:
+        frames = image_frames(args.images, args.repeat)
+    else:
+        frames = camera_frames(args.source or '0', args.max_frames)
+    stream(args.url, frames, args.fps, args.sample_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import io
+import cv2
+import numpy as np
+from frame_stream import iter_jpeg_frames
+
+
+class ChunkedStream:
+    """Flujo de prueba que devuelve los datos en trozos pequeños, como una petición troceada."""
+
+    def __init__(self, data, chunk=97):
+        self.data = io.BytesIO(data)
+        self.chunk = chunk
+
+    def read(self, size):
+        return self.data.read(min(size, self.chunk))
+
+
+def jpeg_with_exif_thumbnail(seed):
+    """JPEG con un segmento APP1 (EXIF) que lleva dentro una miniatura JPEG completa (FFD8...FFD9)."""
+    img = np.random.default_rng(seed).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    frame = cv2.imencode('.jpg', img)[1].tobytes()
+    thumbnail = cv2.imencode('.jpg', cv2.resize(img, (16, 16)))[1].tobytes()
+    payload = b'Exif\x00\x00' + b'II*\x00\x08\x00\x00\x00' + b'\x00\x00' + thumbnail
+    app1 = b'\xff\xe1' + (len(payload) + 2).to_bytes(2, 'big') + payload
+    return frame[:2] + app1 + frame[2:]
+
+
+def test_exif_thumbnail_frames():
+    frames = [jpeg_with_exif_thumbnail(seed) for seed in range(3)]
+    data = b''.join(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + f + b'\r\n' for f in frames)
+
+    out = list(iter_jpeg_frames(ChunkedStream(data)))
+
+    assert out == frames
+    assert all(cv2.imdecode(np.frombuffer(f, np.uint8), cv2.IMREAD_COLOR) is not None for f in out)
+
+
+def test_corrupt_frame_is_skipped():
+    frame = jpeg_with_exif_thumbnail(0)
+    data = b'\xff\xd8\x12garbage' + frame
+
+    assert list(iter_jpeg_frames(ChunkedStream(data))) == [frame]
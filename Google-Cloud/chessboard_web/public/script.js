@@ -47,6 +47,7 @@ const btnModoGrabar = document.getElementById('btn-modo-grabar');
 const btnModoJuego = document.getElementById('btn-modo-juego');
 let grabando = false;
 let intervaloGrabacion = null;
+let sesionGrabacion = null; // Identificador para que la API solo reclasifique las casillas que cambian
 let ultimoTableroDigitalizado = null;
 let stream = null;
 
@@ -409,6 +410,7 @@ function capturarYEnviarFoto() {
     try {
       const formData = new FormData();
       formData.append('file', blob, 'captura.jpg');
+      if (grabando && sesionGrabacion) formData.append('session_id', sesionGrabacion);
       const respuesta = await fetch('https://europe-southwest1-rey-y-dama-mechanical-turk.cloudfunctions.net/predict_chessboard', {
         method: 'POST',
         body: formData
@@ -416,6 +418,12 @@ function capturarYEnviarFoto() {
       console.log("[DEBUG] Status de respuesta de la API de predicción (cámara):", respuesta.status);
       if (!respuesta.ok) throw new Error('Error en la API: ' + respuesta.statusText);
       const datos = await respuesta.json();
+      if (datos.descartado) {
+        // Mano sobre el tablero o pieza a medio mover: se mantiene el último tablero
+        console.log("[DEBUG] Fotograma descartado por la API:", datos.descartado);
+        return;
+      }
+      if (datos.reclasificadas) console.log("[DEBUG] Casillas reclasificadas:", datos.reclasificadas.length);
       await procesarRespuestaAPI(datos);
     } catch (error) {
       console.error('[DEBUG] Error enviando imagen de cámara:', error);
@@ -434,6 +442,7 @@ btnCapturarFoto.addEventListener('click', () => {
 btnModoGrabar.addEventListener('click', () => {
   if (!grabando) {
     grabando = true;
+    sesionGrabacion = (crypto.randomUUID ? crypto.randomUUID() : Date.now().toString(36) + Math.random().toString(36).slice(2));
     btnModoGrabar.textContent = "Detener grabación";
     capturarYEnviarFoto(); // Captura una inmediatamente
     intervaloGrabacion = setInterval(capturarYEnviarFoto, 10000); // cada 10 segundos
@@ -441,6 +450,7 @@ btnModoGrabar.addEventListener('click', () => {
     console.log("[DEBUG] Modo grabar activado");
   } else {
     grabando = false;
+    sesionGrabacion = null;
     btnModoGrabar.textContent = "Modo grabar";
     clearInterval(intervaloGrabacion);
     mostrarMensaje("Modo grabar detenido");
@@ -0,0 +1,104 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(board, multipv=1):
+    """
+    Clave normalizada de una posición: FEN sin contadores de medio movimiento ni de jugadas
+    (EPD: piezas, turno, enroques y al paso) más el número de variantes pedidas.
+    """
+    return f"{board.epd()}|{multipv}"
+
+
+class AnalysisCache:
+    """
+    Caché de análisis tipo tabla de transposición: LRU en memoria con caducidad (TTL) y,
+    opcionalmente, una segunda capa en SQLite que sobrevive a los reinicios del servicio.
+    Cada entrada guarda la profundidad alcanzada, así que un resultado más profundo
+    responde también a peticiones menos profundas de la misma posición.
+    """
+
+    def __init__(self, max_entries=10000, ttl=24 * 3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # clave -> (profundidad, resultado, instante)
+        self.lock = threading.Lock()
+        self.stats = {"hits_memoria": 0, "hits_disco": 0, "misses": 0}
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis "
+                "(key TEXT PRIMARY KEY, depth INTEGER, result TEXT, created REAL)"
+            )
+            self.db.commit()
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _store(self, key, depth, result, created):
+        self.entries[key] = (depth, result, created)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _get_disk(self, key):
+        row = self.db.execute("SELECT depth, result, created FROM analysis WHERE key = ?", (key,)).fetchone()
+        if row is None or self._expired(row[2]):
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def get(self, board, depth, multipv=1):
+        """Devuelve el resultado guardado si se analizó al menos a `depth` y no ha caducado; si no, None."""
+        key = cache_key(board, multipv)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self._expired(entry[2]):
+                del self.entries[key]
+                entry = None
+            if entry is not None and entry[0] >= depth:
+                self.entries.move_to_end(key)
+                self.stats["hits_memoria"] += 1
+                return entry[1]
+
+            if self.db is not None:
+                disk_entry = self._get_disk(key)
+                if disk_entry is not None and disk_entry[0] >= depth:
+                    self._store(key, *disk_entry)
+                    self.stats["hits_disco"] += 1
+                    return disk_entry[1]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, board, depth, result, multipv=1):
+        """Guarda el resultado salvo que ya haya uno vigente más profundo para la misma posición."""
+        key = cache_key(board, multipv)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > depth and not self._expired(entry[2]):
+                return
+            self._store(key, depth, result, now)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT INTO analysis (key, depth, result, created) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, result = excluded.result, "
+                    "created = excluded.created WHERE excluded.depth >= analysis.depth "
+                    "OR analysis.created < ?",
+                    (key, depth, json.dumps(result), now, now - (self.ttl or float("inf"))),
+                )
+                self.db.commit()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entradas_memoria"] = len(self.entries)
+            if self.db is not None:
+                stats["entradas_disco"] = self.db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+        total = stats["hits_memoria"] + stats["hits_disco"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits_memoria"] + stats["hits_disco"]) / total if total else 0.0
+        return stats
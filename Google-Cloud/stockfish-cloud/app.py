@@ -1,11 +1,41 @@
-from flask import Flask, request, jsonify
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
 import chess
 import chess.engine
 from flask_cors import CORS
+from engine_pool import EnginePool, PoolUnavailable, ENGINE_ERRORS
+from analysis_cache import AnalysisCache
 
 app = Flask(__name__)
 CORS(app)
-STOCKFISH_PATH = "./stockfish/stockfish"
+STOCKFISH_PATH = os.environ.get("STOCKFISH_PATH", "./stockfish/stockfish")
+
+# Pool de motores: por defecto un proceso por núcleo, cada uno con un hilo de búsqueda
+POOL_SIZE = int(os.environ.get("STOCKFISH_POOL_SIZE", os.cpu_count() or 1))
+ENGINE_OPTIONS = {
+    "Threads": int(os.environ.get("STOCKFISH_THREADS", 1)),
+    "Hash": int(os.environ.get("STOCKFISH_HASH", 16)),  # MB por motor
+}
+# Segundos que una petición espera un motor libre antes de responder 503
+ENGINE_TIMEOUT = float(os.environ.get("ENGINE_TIMEOUT", 30))
+pool = EnginePool(STOCKFISH_PATH, size=POOL_SIZE, options=ENGINE_OPTIONS, timeout=ENGINE_TIMEOUT)
+# Reparte las posiciones de /batch entre todos los motores del pool
+executor = ThreadPoolExecutor(max_workers=pool.size)
+BATCH_MAX_POSITIONS = int(os.environ.get("BATCH_MAX_POSITIONS", 10000))
+
+# Límite de tiempo duro (ms) para cualquier análisis; sin definir, solo se aplica el que pida cada petición
+MAX_TIME_MS = os.environ.get("ANALYSIS_MAX_TIME_MS")
+
+# Caché de análisis por posición (en memoria y, si se indica ANALYSIS_CACHE_DB, también en SQLite)
+ANALYSIS_DEPTH = 15
+cache = AnalysisCache(
+    max_entries=int(os.environ.get("ANALYSIS_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("ANALYSIS_CACHE_TTL", 24 * 3600)),
+    db_path=os.environ.get("ANALYSIS_CACHE_DB"),
+)
 
 def tablero_a_fen(tablero):
     fen_filas = []
@@ -29,6 +59,134 @@ def tablero_a_fen(tablero):
     fen += " b - - 0 1"
     return fen
 
+def formatear_evaluacion(score):
+    if score.is_mate():
+        return f"Mate en {score.mate()}"
+    eval_cp = score.score() / 100
+    return f"{eval_cp:+.2f}"
+
+def leer_limite(data):
+    """
+    Construye el chess.engine.Limit de la petición a partir de los campos opcionales
+    "profundidad" (por defecto 15), "tiempo_ms" y "nodos". La búsqueda termina en cuanto
+    se alcanza el primero de ellos. Devuelve (profundidad, limite).
+    """
+    depth = int(data.get("profundidad", ANALYSIS_DEPTH))
+    time_ms = data.get("tiempo_ms", MAX_TIME_MS)
+    if time_ms is not None and MAX_TIME_MS is not None:
+        time_ms = min(float(time_ms), float(MAX_TIME_MS))
+    nodes = data.get("nodos")
+    limit = chess.engine.Limit(
+        depth=depth,
+        time=float(time_ms) / 1000 if time_ms is not None else None,
+        nodes=int(nodes) if nodes is not None else None,
+    )
+    return depth, limit
+
+def resultado_analisis(fen, infos, turn=chess.BLACK):
+    """
+    Convierte el análisis de python-chess en la respuesta JSON. `infos` es el info de una
+    variante o la lista de infos de un análisis multipv (la primera es la mejor); la
+    evaluación se da desde el punto de vista de `turn`.
+    """
+    if isinstance(infos, dict):
+        infos = [infos]
+    infos = [info for info in infos if info.get("pv")]
+    best = infos[0]
+    return {
+        "fen": fen,
+        "evaluacion": formatear_evaluacion(best["score"].pov(turn)),
+        "mejor_movimiento": best["pv"][0].uci(),
+        "profundidad": best.get("depth"),
+        "variantes": [
+            {"evaluacion": formatear_evaluacion(info["score"].pov(turn)), "pv": [m.uci() for m in info["pv"]]}
+            for info in infos
+        ],
+    }
+
+def analizar_posicion(board, fen, limit, depth, multipv=1):
+    """Analiza una posición con un motor del pool, consultando y actualizando la caché."""
+    cached = cache.get(board, depth=depth, multipv=multipv)
+    if cached is not None:
+        return cached
+
+    with pool.engine() as engine:
+        infos = engine.analyse(board, limit, multipv=multipv)
+
+    result = resultado_analisis(fen, infos, turn=board.turn)
+    cache.put(board, result["profundidad"] or 0, result, multipv=multipv)
+    return result
+
+def leer_posicion(posicion):
+    """
+    Acepta una posición como tablero (lista de filas, el formato de tablero_a_fen),
+    como FEN, o como objeto {"tablero": ...} / {"fen": ...}. Devuelve (fen, board).
+    Lanza ValueError si la posición no se puede leer o no es legal (p. ej. el bando que
+    no mueve está en jaque).
+    """
+    if isinstance(posicion, dict):
+        posicion = posicion.get("tablero") or posicion.get("fen")
+    try:
+        if isinstance(posicion, list):
+            fen = tablero_a_fen(posicion)
+        elif isinstance(posicion, str):
+            fen = posicion
+        else:
+            raise ValueError
+        board = chess.Board(fen)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError("Posición no válida")
+    if not board.is_valid():
+        raise ValueError("Posición ilegal")
+    return fen, board
+
+def evento_sse(evento, datos):
+    return f"event: {evento}\ndata: {json.dumps(datos)}\n\n"
+
+def analisis_iterativo(board, fen, limit):
+    """
+    Profundización iterativa en streaming (server-sent events): emite un evento "info" por
+    cada profundidad completada y un evento "resultado" final con la mejor jugada encontrada
+    hasta el límite de tiempo/nodos/profundidad.
+    De cada profundidad se toma la última info exacta: las de cota (lowerbound/upperbound)
+    son resultados provisionales de una búsqueda con ventana y no se emiten.
+    """
+    deadline = time.monotonic() + limit.time if limit.time is not None else None
+    try:
+        with pool.engine() as engine:
+            with engine.analysis(board, limit) as analysis:
+                best = None  # Última info exacta de la profundidad en curso
+                for info in analysis:
+                    exacta = ("pv" in info and "score" in info and info.get("depth")
+                              and not info.get("lowerbound") and not info.get("upperbound"))
+                    if exacta:
+                        if best is not None and info["depth"] > best["depth"]:
+                            # Empieza otra profundidad: la anterior está completa
+                            yield evento_sse("info", resultado_analisis(fen, best, turn=board.turn))
+                        best = info
+                    # Corte duro por si el motor se pasa del tiempo asignado
+                    if deadline is not None and time.monotonic() > deadline:
+                        analysis.stop()
+                bestmove = analysis.wait()
+    except PoolUnavailable as e:
+        yield evento_sse("error", {"error": str(e)})
+        return
+
+    if best is None:
+        yield evento_sse("error", {"error": "El motor no devolvió ninguna variante"})
+        return
+    yield evento_sse("info", resultado_analisis(fen, best, turn=board.turn))
+    result = resultado_analisis(fen, best, turn=board.turn)
+    # La jugada final es la que decide el motor (bestmove), igual que en el análisis sin streaming
+    if bestmove.move is not None and bestmove.move != best["pv"][0]:
+        result["mejor_movimiento"] = bestmove.move.uci()
+    cache.put(board, best["depth"], result)
+    yield evento_sse("resultado", result)
+
+@app.errorhandler(PoolUnavailable)
+def motor_no_disponible(e):
+    return jsonify({"error": str(e)}), 503
+
 @app.route("/", methods=["POST"])
 def analizar():
     data = request.get_json()
@@ -36,28 +194,68 @@ def analizar():
     if not tablero:
         return jsonify({"error": "No se envió el tablero"}), 400
 
-    fen = tablero_a_fen(tablero)
-    board = chess.Board(fen)
+    try:
+        fen, board = leer_posicion(tablero)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        depth, limit = leer_limite(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Límite de análisis no válido"}), 400
 
-    engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
-    info = engine.analyse(board, chess.engine.Limit(depth=15))
-    score = info["score"].black()
-    best_move = info["pv"][0]
-    engine.quit()
+    if data.get("stream"):
+        # Un resultado en caché a la profundidad pedida (o más) vale para cualquier presupuesto
+        cached = cache.get(board, depth=depth)
+        if cached is not None:
+            return Response(evento_sse("resultado", cached), mimetype="text/event-stream")
+        return Response(stream_with_context(analisis_iterativo(board, fen, limit)),
+                        mimetype="text/event-stream")
 
-    if score.is_mate():
-        eval_str = f"Mate en {score.mate()}"
-    else:
-        eval_cp = score.score() / 100
-        eval_str = f"{eval_cp:+.2f}"
+    # analizar_posicion ya consulta la caché
+    return jsonify(analizar_posicion(board, fen, limit, depth))
 
-    return jsonify({
-        "fen": fen,
-        "evaluacion": eval_str,
-        "mejor_movimiento": best_move.uci()
-    })
+@app.route("/batch", methods=["POST"])
+def analizar_lote():
+    """
+    Analiza una lista de posiciones ("posiciones": tableros o FENs) repartidas entre los
+    motores del pool. Acepta los mismos límites que "/" y "multipv" para devolver las N
+    mejores variantes de cada posición. Las posiciones no válidas devuelven un error propio
+    sin invalidar el resto del lote.
+    """
+    data = request.get_json()
+    posiciones = data.get("posiciones")
+    if not posiciones or not isinstance(posiciones, list):
+        return jsonify({"error": "No se enviaron posiciones"}), 400
+    if len(posiciones) > BATCH_MAX_POSITIONS:
+        return jsonify({"error": f"Máximo {BATCH_MAX_POSITIONS} posiciones por lote"}), 400
+    try:
+        depth, limit = leer_limite(data)
+        multipv = int(data.get("multipv", 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Límite de análisis no válido"}), 400
+
+    def analizar_una(posicion):
+        try:
+            fen, board = leer_posicion(posicion)
+        except ValueError as e:
+            return {"error": str(e)}
+        if board.is_game_over():
+            return {"fen": fen, "error": "La partida ha terminado en esta posición"}
+        try:
+            return analizar_posicion(board, fen, limit, depth, multipv=multipv)
+        except ENGINE_ERRORS as e:
+            # Un fallo del motor solo invalida esta posición; el pool ya lo ha reiniciado
+            return {"fen": fen, "error": f"Error del motor: {e}"}
+        except PoolUnavailable as e:
+            return {"fen": fen, "error": str(e)}
+
+    resultados = list(executor.map(analizar_una, posiciones))
+    return jsonify({"resultados": resultados})
+
+@app.route("/stats", methods=["GET"])
+def estadisticas():
+    return jsonify({"cache": cache.get_stats(), "motores": pool.size, "reinicios_motor": pool.restarts})
 
 if __name__ == "__main__":
-    import os
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port)
\ No newline at end of file
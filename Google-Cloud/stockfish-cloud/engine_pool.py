@@ -0,0 +1,107 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+import chess.engine
+
+ENGINE_ERRORS = (chess.engine.EngineError, chess.engine.EngineTerminatedError, TimeoutError)
+
+
+class PoolUnavailable(Exception):
+    """No hay ningún motor libre en el tiempo de espera o no se ha podido arrancar uno (HTTP 503)."""
+
+
+class EnginePool:
+    """
+    Pool de procesos Stockfish de larga duración.
+    Cada petición toma un motor (checkout), lo usa en exclusiva y lo devuelve (checkin),
+    así que solo se paga el arranque del proceso y el handshake UCI al crear el pool.
+    Los motores que se han caído se reinician al devolverlos o al volver a tomarlos. Si el
+    reinicio falla, el hueco vuelve a la cola vacío (None) y se intenta arrancar en el siguiente
+    checkout, así el pool nunca pierde motores.
+    """
+
+    def __init__(self, path, size=None, options=None, timeout=30):
+        self.path = path
+        self.size = size or os.cpu_count() or 1
+        self.options = options or {}
+        self.timeout = timeout  # Segundos máximos esperando un motor libre
+        self.engines = queue.Queue()
+        self.restarts = 0
+        self.lock = threading.Lock()
+        for _ in range(self.size):
+            self.engines.put(self._start())
+
+    def _start(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.path)
+        if self.options:
+            engine.configure(self.options)
+        return engine
+
+    def _restart(self, engine):
+        if engine is not None:
+            try:
+                engine.quit()
+            except Exception:
+                engine.close()
+        with self.lock:
+            self.restarts += 1
+        return self._start()
+
+    def _healthy(self, engine):
+        if engine is None:
+            return False
+        try:
+            engine.ping()
+            return True
+        except ENGINE_ERRORS:
+            return False
+
+    def checkout(self, timeout=None):
+        """
+        Toma un motor libre del pool (espera hasta timeout segundos, por defecto self.timeout) y
+        comprueba que responde. Lanza PoolUnavailable si no hay motor libre o no arranca.
+        """
+        try:
+            engine = self.engines.get(timeout=timeout or self.timeout)
+        except queue.Empty:
+            raise PoolUnavailable("No hay motores libres")
+        if not self._healthy(engine):
+            try:
+                engine = self._restart(engine)
+            except Exception:
+                self.engines.put(None)
+                raise PoolUnavailable("No se pudo arrancar el motor")
+        return engine
+
+    def checkin(self, engine, healthy=True):
+        """Devuelve el motor al pool; si ha fallado durante el análisis se reinicia antes."""
+        if not healthy:
+            try:
+                engine = self._restart(engine)
+            except Exception:
+                engine = None  # Se vuelve a intentar en el siguiente checkout
+        self.engines.put(engine)
+
+    @contextmanager
+    def engine(self, timeout=None):
+        """Context manager para usar un motor del pool: with pool.engine() as engine: ..."""
+        engine = self.checkout(timeout)
+        healthy = True
+        try:
+            yield engine
+        except ENGINE_ERRORS:
+            healthy = False
+            raise
+        finally:
+            self.checkin(engine, healthy)
+
+    def close(self):
+        while not self.engines.empty():
+            engine = self.engines.get_nowait()
+            if engine is None:
+                continue
+            try:
+                engine.quit()
+            except ENGINE_ERRORS:
+                engine.close()
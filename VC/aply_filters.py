@@ -109,6 +109,129 @@ def all_filters_and_rotations(cell):
 
     return augmented  # Lista de imágenes (cada una 64x64x3 RGB)
 
+
+def all_filters_and_rotations_batch(cells):
+    """
+    Versión vectorizada de all_filters_and_rotations para N casillas a la vez.
+    Cada filtro se calcula una sola vez sobre las casillas apiladas (N, 64, 64) y las
+    rotaciones y flips se obtienen como vistas de NumPy (np.rot90, slicing), sin copias
+    intermedias. El resultado es idéntico bit a bit a apilar all_filters_and_rotations(cell).
+    Devuelve un array (N, 40, 64, 64, 3) en RGB.
+    """
+    cells = np.stack([cv2.resize(cell, (64, 64)) for cell in cells])  # (N, 64, 64, 3) BGR
+    n = len(cells)
+
+    # Escala de grises una sola vez para todas las casillas (conversión píxel a píxel)
+    gray = cv2.cvtColor(cells.reshape(n * 64, 64, 3), cv2.COLOR_BGR2GRAY).reshape(n, 64, 64)
+
+    # Binarización: cada casilla lleva su propio borde replicado (como BORDER_REPLICATE|BORDER_ISOLATED)
+    padded = np.pad(gray, ((0, 0), (5, 5), (5, 5)), mode='edge')
+    thresh = cv2.adaptiveThreshold(
+        padded.reshape(n * 74, 74), 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    ).reshape(n, 74, 74)[:, 5:-5, 5:-5]
+
+    # Sobel: borde reflejado por casilla (BORDER_REFLECT_101, el de cv2.Sobel por defecto)
+    padded = np.pad(gray, ((0, 0), (1, 1), (1, 1)), mode='reflect').reshape(n * 66, 66)
+    sobelx = cv2.Sobel(padded, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(padded, cv2.CV_64F, 0, 1, ksize=3)
+    sobel = cv2.magnitude(sobelx, sobely).reshape(n, 66, 66)[:, 1:-1, 1:-1]
+    sobel = np.uint8(np.clip(sobel, 0, 255))
+
+    # Canny: la histéresis conecta bordes entre píxeles vecinos, así que se aplica por casilla
+    canny = np.stack([cv2.Canny(g, 100, 200) for g in gray])
+
+    rgb = cv2.cvtColor(cells.reshape(n * 64, 64, 3), cv2.COLOR_BGR2RGB).reshape(n, 64, 64, 3)
+    return stack_filters_and_rotations(rgb, [gray, thresh, sobel, canny])
+
+
+def stack_filters_and_rotations(rgb, planes):
+    """
+    Construye el array (N, 40, 64, 64, 3) de all_filters_and_rotations_batch a partir de la
+    imagen RGB (N, 64, 64, 3) y los planos de un canal [gris, binarización, sobel, canny] (N, 64, 64).
+    """
+    n = len(rgb)
+    augmented = np.empty((n, 1 + len(planes), 8, 64, 64, 3), dtype=np.uint8)
+
+    # Filtros de un canal: rotaciones y flips sobre los planos (N, 4, 64, 64) y paso a RGB al final
+    planes = np.stack(planes, axis=1)
+    rotated = np.empty((n, planes.shape[1], 8, 64, 64), dtype=np.uint8)
+    rotations_and_flips_views(planes, rotated)
+    augmented[:, 1:] = cv2.cvtColor(rotated.reshape(-1, 64), cv2.COLOR_GRAY2RGB).reshape(rotated.shape + (3,))
+
+    # Imagen RGB: cada píxel se ve como un único elemento de 3 bytes para rotar píxeles enteros
+    rgb = np.ascontiguousarray(rgb)
+    rotations_and_flips_views(rgb.view('V3')[..., 0], augmented[:, 0].view('V3')[..., 0])
+
+    return augmented.reshape(n, -1, 64, 64, 3)
+
+
+def rotations_and_flips_views(stack, out):
+    """
+    Escribe en out[..., j, :, :] las rotaciones (0°, 90°, 180°, 270°) y flips horizontales de stack[..., :, :]
+    en el mismo orden que all_filters_and_rotations, usando vistas de NumPy.
+    """
+    for k in range(4):
+        # np.rot90 con k negativo gira en sentido horario, igual que cv2.rotate
+        rot = np.rot90(stack, k=-k, axes=(-2, -1))
+        out[..., 2 * k, :, :] = rot
+        out[..., 2 * k + 1, :, :] = rot[..., ::-1]  # flip horizontal
+
+
+def board_filter_planes(board, size=512):
+    """
+    Redimensiona el tablero recortado una sola vez (8 casillas de size // 8 píxeles por lado) y aplica
+    gris, binarización adaptativa, Sobel, Canny y canal V de HSV sobre el tablero completo.
+    Los filtros de vecindad ven los píxeles de las casillas vecinas en vez del borde de cada casilla.
+    :param board: Imagen del tablero recortado (BGR), por ejemplo la de detect_and_crop_board
+    :param size: Lado del tablero redimensionado
+    :return: Tupla (tablero BGR, gris, binarización, sobel, canny, canal V), todos de size x size
+    """
+    # Mismas 64 casillas que divide_board: se descarta el resto si el lado no es múltiplo de 8
+    cell_size = board.shape[0] // 8
+    board = cv2.resize(board[:8 * cell_size, :8 * cell_size], (size, size))
+
+    gray = cv2.cvtColor(board, cv2.COLOR_BGR2GRAY)
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, 11, 2)
+    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+    sobel = np.uint8(np.clip(cv2.magnitude(sobelx, sobely), 0, 255))
+    canny = cv2.Canny(gray, 100, 200)
+    v = cv2.cvtColor(board, cv2.COLOR_BGR2HSV)[:, :, 2]
+    return board, gray, thresh, sobel, canny, v
+
+
+def board_cells_view(plane):
+    """
+    Devuelve las 64 casillas de un plano del tablero (size x size[, C]) como una vista
+    (8, 8, size // 8, size // 8[, C]) sin copiar píxeles, en el mismo orden fila/columna que divide_board.
+    """
+    s = plane.shape[0] // 8
+    return plane.reshape(8, s, 8, s, *plane.shape[2:]).swapaxes(1, 2)
+
+
+def board_apply_filters(board):
+    """
+    Equivalente a apply_filters sobre las 64 casillas, pero filtrando el tablero completo una sola vez.
+    Devuelve una vista (8, 8, 64, 64, 5) con los canales [gris, binarización, sobel, canny, V].
+    """
+    _, gray, thresh, sobel, canny, v = board_filter_planes(board)
+    filtered = np.stack([gray, thresh, sobel, canny, v], axis=-1)
+    return board_cells_view(filtered)
+
+
+def board_filters_and_rotations(board):
+    """
+    Equivalente a all_filters_and_rotations_batch sobre las 64 casillas, pero filtrando el tablero
+    completo una sola vez. Devuelve un array (64, 40, 64, 64, 3) en RGB.
+    """
+    board, gray, thresh, sobel, canny, _ = board_filter_planes(board)
+    rgb = cv2.cvtColor(board, cv2.COLOR_BGR2RGB)
+    cells = [board_cells_view(p).reshape(64, 64, 64, *p.shape[2:]) for p in (rgb, gray, thresh, sobel, canny)]
+    return stack_filters_and_rotations(cells[0], cells[1:])
+
+
 import cv2
 import numpy as np
 import random
@@ -144,99 +267,179 @@ def get_rotations_and_flips(img):
         augmented.append(cv2.flip(rot, 1))  # flip horizontal
     return augmented
 
-def apply_all_augmentations(cell):
+# Espacio de combinaciones de apply_all_augmentations (en el orden de los bucles originales)
+TRANSLATIONS = [(-5, 0), (5, 0), (0, -5), (0, 5), (0, 0)]  # izquierda, derecha, arriba, abajo, sin mover
+ZOOMS = [0.9, 1.0, 1.1]  # zoom-out, original, zoom-in
+SHEARS = [-10, 0, 10]    # cizalladura en grados
+SMALL_ROTATIONS = [-5, 0, 5]  # pequeñas rotaciones
+BRIGHTNESS = [0.8, 1.0, 1.2]
+CONTRASTS = [0.8, 1.0, 1.2]
+SATURATIONS = [0.8, 1.0, 1.2]
+AUGMENTATION_AXES = (5, 8, len(TRANSLATIONS), len(ZOOMS), len(SHEARS), len(SMALL_ROTATIONS),
+                     len(BRIGHTNESS), len(CONTRASTS), len(SATURATIONS))
+
+def compose_affine(*matrices):
+    """
+    Compone matrices afines 2x3 en una sola: compose_affine(A, B) equivale a aplicar primero A y
+    después B (es decir, B @ A en coordenadas homogéneas).
+    """
+    M = np.eye(3)
+    for m in matrices:
+        M = np.vstack([np.asarray(m, np.float64), [0, 0, 1]]) @ M
+    return M[:2]
+
+def geometric_matrix(tx=0, ty=0, zoom=1.0, shear=0, angle=0, size=64):
+    """
+    Matriz afín 2x3 equivalente a aplicar, por este orden, traslación, zoom centrado,
+    cizalladura y rotación pequeña, para hacer una sola warpAffine en lugar de encadenarlas.
+    """
+    c = size / 2
+    return compose_affine(
+        [[1, 0, tx], [0, 1, ty]],
+        [[zoom, 0, c * (1 - zoom)], [0, zoom, c * (1 - zoom)]],
+        [[1, np.tan(np.radians(shear)), 0], [0, 1, 0]],
+        cv2.getRotationMatrix2D((c, c), angle, 1),
+    )
+
+def affine_maps(matrices, size=64):
+    """
+    Mapas de coordenadas para cv2.remap equivalentes a warpAffine con cada matriz, apilados en
+    vertical ((len(matrices) * size, size)) y convertidos a punto fijo. Se pueden reutilizar
+    con warp_affine_batch para todas las imágenes que usen las mismas matrices.
+    """
+    # Para cada píxel de salida, la posición de origen es la inversa de M aplicada a (x, y, 1)
+    inv = np.array([cv2.invertAffineTransform(np.asarray(M, np.float64)) for M in matrices], np.float32)
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float32)
+    points = np.stack([xs, ys, np.ones_like(xs)], axis=-1).reshape(-1, 3)
+    maps = np.ascontiguousarray((points @ inv.transpose(0, 2, 1)).reshape(-1, size, 2))
+    return cv2.convertMaps(maps, None, cv2.CV_16SC2)
+
+def warp_affine_batch(img, matrices=None, maps=None, size=64, border=cv2.BORDER_REFLECT):
+    """
+    Aplica varias matrices afines a la misma imagen con una sola llamada a cv2.remap.
+    Aproxima cv2.warpAffine(img, M, (size, size), borderMode=border) para cada M, pero no es
+    idéntico: remap interpola en punto fijo con otros redondeos. Medido con rotaciones de ±30° y
+    escalas 0.8-1.2: hasta 3 niveles de gris en casillas reales (0.04 de media) y hasta 7 en
+    ruido aleatorio (0.8 de media). Vale para augmentación, no para comparar bit a bit.
+    Se le pasan las matrices o directamente los mapas de affine_maps.
+    Devuelve un array (n_matrices, size, size, C).
+    """
+    if maps is None:
+        maps = affine_maps(matrices, size)
+    warped = cv2.remap(img, maps[0], maps[1], cv2.INTER_LINEAR, borderMode=border)
+    return warped.reshape((-1, size, size) + img.shape[2:])
+
+_NOISE_POOLS = {}  # (size, sigma) -> bloque de ruido
+
+def noise_pool(size=256, sigma=10):
+    """
+    Bloque de ruido gaussiano precalculado (size, 64, 64, 3) en float32, en escala [0, 1].
+    Se genera una sola vez por cada (size, sigma); cada muestra toma una de sus imágenes al azar.
+    """
+    if (size, sigma) not in _NOISE_POOLS:
+        _NOISE_POOLS[size, sigma] = np.random.default_rng(0).normal(0, sigma / 255, (size, 64, 64, 3)).astype(np.float32)
+    return _NOISE_POOLS[size, sigma]
+
+def photometric_batch(imgs, bright, contrast, sat, rng):
+    """
+    Brillo, contraste, saturación, blur, ruido, oclusión y sombra para un lote (N, 64, 64, 3) uint8 RGB,
+    en el mismo orden que el aumento original imagen a imagen. bright, contrast y sat son arrays (N,) con
+    el factor de cada muestra. Todo se hace en float32 con broadcasting y cada paso RGB <-> HSV es una sola
+    llamada para todo el lote; el ruido se suma en float y se recorta al final, sin desbordar como al
+    sumar ruido convertido a uint8.
+    """
+    n = len(imgs)
+    x = imgs.astype(np.float32)
+    x *= 1 / 255
+    bright = np.asarray(bright, np.float32)[:, None, None]
+    contrast = np.asarray(contrast, np.float32)[:, None, None, None]
+    sat = np.asarray(sat, np.float32)[:, None, None]
+
+    def scale_hsv(x, channel, factor):
+        # Multiplica un canal HSV (1: S, 2: V, en [0, 1] en float32) por el factor de cada muestra
+        hsv = cv2.cvtColor(x.reshape(-1, 64, 3), cv2.COLOR_RGB2HSV).reshape(n, 64, 64, 3)
+        hsv[..., channel] *= factor
+        np.minimum(hsv[..., channel], 1, out=hsv[..., channel])
+        return cv2.cvtColor(hsv.reshape(-1, 64, 3), cv2.COLOR_HSV2RGB).reshape(n, 64, 64, 3)
+
+    # Brillo
+    x = scale_hsv(x, 2, bright)
+    # Contraste alrededor de 128
+    x -= 128 / 255
+    x *= contrast
+    x += 128 / 255
+    np.clip(x, 0, 1, out=x)
+    # Saturación
+    x = scale_hsv(x, 1, sat)
+    # Blur: cada imagen lleva una fila de reflejo arriba y abajo para poder filtrar el lote apilado
+    # en una sola llamada sin mezclar filas de imágenes vecinas
+    padded = np.empty((n, 66, 64, 3), np.float32)
+    padded[:, 1:-1] = x
+    padded[:, 0] = x[:, 1]
+    padded[:, -1] = x[:, -2]
+    x = cv2.GaussianBlur(padded.reshape(-1, 64, 3), (3, 3), 0).reshape(n, 66, 64, 3)[:, 1:-1]
+    # Ruido
+    pool = noise_pool()
+    x += pool[rng.integers(0, len(pool), n)]
+    np.clip(x, 0, 1, out=x)
+
+    ys, xs = np.mgrid[0:64, 0:64]
+    # Oclusión (random erasing) en el 30% de las muestras
+    se = rng.uniform(0.02, 0.1, n) * 64 * 64
+    re = rng.uniform(0.3, 3.3, n)
+    he = np.sqrt(se * re).astype(int)
+    we = np.sqrt(se / re).astype(int)
+    occ = np.flatnonzero((rng.random(n) < 0.3) & (he < 64) & (we < 64))
+    xe = (rng.random(len(occ)) * (64 - we[occ]))[:, None, None].astype(int)
+    ye = (rng.random(len(occ)) * (64 - he[occ]))[:, None, None].astype(int)
+    occ_mask = ((xs >= xe) & (xs < xe + we[occ, None, None]) & (ys >= ye) & (ys < ye + he[occ, None, None]))
+    occluded = x[occ]
+    occluded[occ_mask] = rng.random((int(occ_mask.sum()), 3), np.float32)
+    x[occ] = occluded
+    # Sombra artificial en el 20% de las muestras
+    shadow = np.flatnonzero(rng.random(n) < 0.2)
+    top_x, bot_x = rng.integers(0, 64, (2, len(shadow), 1, 1))
+    alpha = rng.uniform(0.5, 0.85, (len(shadow), 1, 1)).astype(np.float32)
+    factor = np.where((xs - top_x) * (bot_x - top_x) >= 0, alpha, np.float32(1))
+    x[shadow] *= factor[..., None]
+
+    return cv2.convertScaleAbs(x.reshape(-1, 64, 3), alpha=255).reshape(n, 64, 64, 3)
+
+def apply_all_augmentations(cell, budget=None, seed=None, chunk_size=256):
+    """
+    Generador de aumentos de una casilla: filtros x rotaciones/flips x traslaciones x zooms x
+    cizalladuras x rotaciones pequeñas x brillo x contraste x saturación.
+    Con budget=None recorre todas las combinaciones en el orden de siempre; con budget=N devuelve
+    N combinaciones distintas escogidas al azar. seed (entero o np.random.Generator) fija el muestreo
+    y los efectos aleatorios. La parte geométrica se aplica con una sola matriz por muestra, y las
+    muestras de cada bloque de chunk_size que parten de la misma vista se deforman en un único remap.
+    La parte fotométrica se aplica a todo el bloque a la vez con photometric_batch.
+    """
+    rng = np.random.default_rng(seed)
     # Tamaño estándar
     cell = cv2.resize(cell, (64, 64))
-    all_augmented = []
-
-    # Filtros básicos
-    filtered = get_basic_filters(cell)
-
-    # Parámetros para traslaciones, zoom, shear y rotaciones pequeñas
-    translations = [(-5,0), (5,0), (0,-5), (0,5), (0,0)]  # izquierda, derecha, arriba, abajo, sin mover
-    zooms = [0.9, 1.0, 1.1]  # zoom-out, original, zoom-in
-    shears = [-10, 0, 10]    # cizalladura en grados
-    small_rotations = [-5, 0, 5]  # pequeñas rotaciones
-
-    # Para cada filtro básico
-    for fimg in filtered:
-        # Rotaciones y flips
-        for rimg in get_rotations_and_flips(fimg):
-            # Traslaciones
-            for tx, ty in translations:
-                M = np.float32([[1, 0, tx], [0, 1, ty]])
-                timg = cv2.warpAffine(rimg, M, (64, 64), borderMode=cv2.BORDER_REFLECT)
-                # Zooms
-                for zoom in zooms:
-                    if zoom == 1.0:
-                        zimg = timg.copy()
-                    else:
-                        h, w = timg.shape[:2]
-                        new_h, new_w = int(h * zoom), int(w * zoom)
-                        zimg = cv2.resize(timg, (new_w, new_h))
-                        if zoom < 1:
-                            pad_h = (h - new_h) // 2
-                            pad_w = (w - new_w) // 2
-                            zimg = cv2.copyMakeBorder(zimg, pad_h, h - new_h - pad_h, pad_w, w - new_w - pad_w, cv2.BORDER_REFLECT)
-                        else:
-                            crop_h = (new_h - h) // 2
-                            crop_w = (new_w - w) // 2
-                            zimg = zimg[crop_h:crop_h + h, crop_w:crop_w + w]
-                    # Shear
-                    for shear in shears:
-                        M_shear = np.float32([[1, np.tan(np.radians(shear)), 0], [0, 1, 0]])
-                        s_img = cv2.warpAffine(zimg, M_shear, (64, 64), borderMode=cv2.BORDER_REFLECT)
-                        # Pequeñas rotaciones
-                        for angle in small_rotations:
-                            if angle == 0:
-                                rot_img = s_img.copy()
-                            else:
-                                M_rot = cv2.getRotationMatrix2D((32, 32), angle, 1)
-                                rot_img = cv2.warpAffine(s_img, M_rot, (64, 64), borderMode=cv2.BORDER_REFLECT)
-                            # Fotométricas y efectos
-                            # Brillo
-                            hsv = cv2.cvtColor(rot_img, cv2.COLOR_RGB2HSV)
-                            for bright in [0.8, 1.0, 1.2]:
-                                hsv_b = hsv.copy()
-                                hsv_b[:,:,2] = np.clip(hsv_b[:,:,2] * bright, 0, 255)
-                                bright_img = cv2.cvtColor(hsv_b, cv2.COLOR_HSV2RGB)
-                                # Contraste
-                                for contrast in [0.8, 1.0, 1.2]:
-                                    c_img = np.clip((bright_img - 128) * contrast + 128, 0, 255).astype(np.uint8)
-                                    # Saturación
-                                    hsv_c = cv2.cvtColor(c_img, cv2.COLOR_RGB2HSV)
-                                    for sat in [0.8, 1.0, 1.2]:
-                                        hsv_c2 = hsv_c.copy()
-                                        hsv_c2[:,:,1] = np.clip(hsv_c2[:,:,1] * sat, 0, 255)
-                                        sat_img = cv2.cvtColor(hsv_c2, cv2.COLOR_HSV2RGB)
-                                        # Blur y ruido
-                                        blur_img = cv2.GaussianBlur(sat_img, (3,3), 0)
-                                        noise = np.random.normal(0, 10, blur_img.shape).astype(np.uint8)
-                                        noisy_img = cv2.add(blur_img, noise)
-                                        # Oclusión (random erasing)
-                                        occ_img = noisy_img.copy()
-                                        if random.random() < 0.3:
-                                            h, w, _ = occ_img.shape
-                                            se = np.random.uniform(0.02, 0.1) * h * w
-                                            re = np.random.uniform(0.3, 3.3)
-                                            he = int(np.sqrt(se * re))
-                                            we = int(np.sqrt(se / re))
-                                            if he < h and we < w:
-                                                xe = np.random.randint(0, w - we)
-                                                ye = np.random.randint(0, h - he)
-                                                occ_img[ye:ye+he, xe:xe+we, :] = np.random.randint(0, 255, (he, we, 3))
-                                        # Sombra artificial
-                                        shadow_img = occ_img.copy()
-                                        if random.random() < 0.2:
-                                            h, w = shadow_img.shape[:2]
-                                            top_x, bot_x = np.random.randint(0, w, 2)
-                                            shadow_mask = np.zeros_like(shadow_img[:,:,0])
-                                            X_m = np.mgrid[0:h, 0:w][1]
-                                            shadow_mask[((X_m - top_x) * (bot_x - top_x) >= 0)] = 1
-                                            alpha = np.random.uniform(0.5, 0.85)
-                                            shadow_img[shadow_mask == 1] = (shadow_img[shadow_mask == 1] * alpha).astype(np.uint8)
-                                        all_augmented.append(shadow_img)
-    return all_augmented
+
+    # Filtros básicos con sus rotaciones y flips (40 vistas, se calculan una vez)
+    views = [rimg for fimg in get_basic_filters(cell) for rimg in get_rotations_and_flips(fimg)]
+
+    total = int(np.prod(AUGMENTATION_AXES))
+    if budget is None or budget >= total:
+        indices = range(total)
+    else:
+        indices = rng.choice(total, size=budget, replace=False)
+
+    # Por bloques: las muestras de una misma vista se deforman juntas con warp_affine_batch
+    for start in range(0, len(indices), chunk_size):
+        f, r, t, z, s, a, b, c, sa = np.unravel_index(np.asarray(indices[start:start + chunk_size]), AUGMENTATION_AXES)
+        view_idx = f * 8 + r
+        warped = np.empty((len(view_idx), 64, 64, 3), np.uint8)
+        for v in np.unique(view_idx):
+            sel = np.flatnonzero(view_idx == v)
+            matrices = [geometric_matrix(*TRANSLATIONS[t[i]], ZOOMS[z[i]], SHEARS[s[i]], SMALL_ROTATIONS[a[i]])
+                        for i in sel]
+            warped[sel] = warp_affine_batch(views[v], matrices)
+        yield from photometric_batch(warped, np.take(BRIGHTNESS, b), np.take(CONTRASTS, c),
+                                     np.take(SATURATIONS, sa), rng)
 
 # --- AUMENTOS EXTRA (opcional) ---
 
@@ -247,23 +450,16 @@ def augment_image(img):
     img_aug = img.copy()
     h, w = img.shape[:2]
 
-    # Traslación aleatoria
+    # Traslación y zoom aleatorios, compuestos en una sola warpAffine
+    transforms = []
     if random.random() < 0.3:
         tx, ty = random.randint(-5, 5), random.randint(-5, 5)
-        M = np.float32([[1, 0, tx], [0, 1, ty]])
-        img_aug = cv2.warpAffine(img_aug, M, (w, h), borderMode=cv2.BORDER_REFLECT)
-
-    # Zoom aleatorio
+        transforms.append([[1, 0, tx], [0, 1, ty]])
     if random.random() < 0.3:
         scale = random.uniform(0.9, 1.1)
-        new_size = int(64 * scale)
-        img_zoom = cv2.resize(img_aug, (new_size, new_size))
-        if scale < 1.0:
-            pad = (64 - new_size) // 2
-            img_aug = cv2.copyMakeBorder(img_zoom, pad, 64-new_size-pad, pad, 64-new_size-pad, cv2.BORDER_REFLECT)
-        else:
-            crop = (new_size - 64) // 2
-            img_aug = img_zoom[crop:crop+64, crop:crop+64]
+        transforms.append([[scale, 0, w / 2 * (1 - scale)], [0, scale, h / 2 * (1 - scale)]])
+    if transforms:
+        img_aug = cv2.warpAffine(img_aug, compose_affine(*transforms), (w, h), borderMode=cv2.BORDER_REFLECT)
 
     # Brillo y contraste aleatorio
     if random.random() < 0.3:
@@ -273,8 +469,8 @@ def augment_image(img):
 
     # Ruido gaussiano
     if random.random() < 0.2:
-        noise = np.random.normal(0, 10, img_aug.shape).astype(np.uint8)
-        img_aug = cv2.add(img_aug, noise)
+        noise = np.random.normal(0, 10, img_aug.shape)
+        img_aug = np.clip(img_aug + noise, 0, 255).astype(np.uint8)
 
     # Blur
     if random.random() < 0.2:
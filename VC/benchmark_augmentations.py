@@ -0,0 +1,134 @@
+"""
+Compara la parte geométrica de apply_all_augmentations (traslación, zoom, cizalladura y rotación pequeña)
+sobre las mismas casillas en cuatro versiones:
+  - cadena: la versión anterior, con una warpAffine/resize por transformación
+  - fusionada: una sola warpAffine con la matriz compuesta (geometric_matrix)
+  - lote: warp_affine_batch, un único remap para todas las muestras de una misma casilla
+  - lote con mapas: igual, pero reutilizando los mapas de affine_maps entre casillas
+Muestra el rendimiento (imágenes/s) y la diferencia con la cadena (media absoluta y PSNR, en toda
+la imagen y en el centro, donde no influye el relleno por reflejo).
+Después compara la parte fotométrica imagen a imagen (versión anterior) con photometric_batch.
+
+Uso:
+    python benchmark_augmentations.py --image img/board1.jpeg
+"""
+import argparse
+import itertools
+import time
+import cv2
+import numpy as np
+from aply_filters import (TRANSLATIONS, ZOOMS, SHEARS, SMALL_ROTATIONS, BRIGHTNESS, CONTRASTS, SATURATIONS,
+                          geometric_matrix, affine_maps, warp_affine_batch, photometric_batch)
+from crop_board import crop_and_divide_board
+
+COMBOS = list(itertools.product(TRANSLATIONS, ZOOMS, SHEARS, SMALL_ROTATIONS))
+
+
+def chained_geometry(img, tx, ty, zoom, shear, angle):
+    """Transformaciones geométricas encadenadas, tal y como se hacían antes en apply_all_augmentations."""
+    M = np.float32([[1, 0, tx], [0, 1, ty]])
+    timg = cv2.warpAffine(img, M, (64, 64), borderMode=cv2.BORDER_REFLECT)
+    if zoom == 1.0:
+        zimg = timg.copy()
+    else:
+        h, w = timg.shape[:2]
+        new_h, new_w = int(h * zoom), int(w * zoom)
+        zimg = cv2.resize(timg, (new_w, new_h))
+        if zoom < 1:
+            pad_h = (h - new_h) // 2
+            pad_w = (w - new_w) // 2
+            zimg = cv2.copyMakeBorder(zimg, pad_h, h - new_h - pad_h, pad_w, w - new_w - pad_w, cv2.BORDER_REFLECT)
+        else:
+            crop_h = (new_h - h) // 2
+            crop_w = (new_w - w) // 2
+            zimg = zimg[crop_h:crop_h + h, crop_w:crop_w + w]
+    M_shear = np.float32([[1, np.tan(np.radians(shear)), 0], [0, 1, 0]])
+    s_img = cv2.warpAffine(zimg, M_shear, (64, 64), borderMode=cv2.BORDER_REFLECT)
+    if angle == 0:
+        return s_img.copy()
+    M_rot = cv2.getRotationMatrix2D((32, 32), angle, 1)
+    return cv2.warpAffine(s_img, M_rot, (64, 64), borderMode=cv2.BORDER_REFLECT)
+
+
+def single_photometric(img, bright, contrast, sat):
+    """Brillo, contraste, saturación, blur y ruido imagen a imagen, como en la versión anterior."""
+    hsv = cv2.cvtColor(img, cv2.COLOR_RGB2HSV)
+    hsv[:,:,2] = np.clip(hsv[:,:,2] * bright, 0, 255)
+    bright_img = cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
+    c_img = np.clip((bright_img - 128) * contrast + 128, 0, 255).astype(np.uint8)
+    hsv_c = cv2.cvtColor(c_img, cv2.COLOR_RGB2HSV)
+    hsv_c[:,:,1] = np.clip(hsv_c[:,:,1] * sat, 0, 255)
+    sat_img = cv2.cvtColor(hsv_c, cv2.COLOR_HSV2RGB)
+    blur_img = cv2.GaussianBlur(sat_img, (3,3), 0)
+    noise = np.random.normal(0, 10, blur_img.shape).astype(np.uint8)
+    return cv2.add(blur_img, noise)
+
+
+def run_chain(cells):
+    return np.array([chained_geometry(cell, tx, ty, z, s, a) for cell in cells for (tx, ty), z, s, a in COMBOS])
+
+
+def run_fused(cells):
+    matrices = [geometric_matrix(tx, ty, z, s, a) for (tx, ty), z, s, a in COMBOS]
+    return np.array([cv2.warpAffine(cell, M, (64, 64), borderMode=cv2.BORDER_REFLECT)
+                     for cell in cells for M in matrices])
+
+
+def run_batch(cells):
+    matrices = [geometric_matrix(tx, ty, z, s, a) for (tx, ty), z, s, a in COMBOS]
+    return np.concatenate([warp_affine_batch(cell, matrices) for cell in cells])
+
+
+def run_batch_maps(cells):
+    maps = affine_maps([geometric_matrix(tx, ty, z, s, a) for (tx, ty), z, s, a in COMBOS])
+    return np.concatenate([warp_affine_batch(cell, maps=maps) for cell in cells])
+
+
+def timed(fn, cells, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn(cells)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def parity(ref, out, margin=12):
+    """Diferencia media absoluta y PSNR respecto a la referencia, en toda la imagen y en el centro."""
+    diff = ref.astype(np.float64) - out.astype(np.float64)
+    center = diff[:, margin:-margin, margin:-margin]
+    psnr = 10 * np.log10(255 ** 2 / max(np.mean(diff ** 2), 1e-12))
+    return np.abs(diff).mean(), np.abs(center).mean(), psnr
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image', type=str, default='img/board1.jpeg', help='Imagen de tablero')
+    parser.add_argument('--cells', type=int, default=64, help='Casillas usadas')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeticiones (se toma la mejor)')
+    args = parser.parse_args()
+
+    board_cells = crop_and_divide_board(cv2.imread(args.image), margin_pct=0.05, debug=False)
+    cells = [cv2.cvtColor(cv2.resize(cell, (64, 64)), cv2.COLOR_BGR2RGB) for cell in board_cells[:args.cells]]
+    n_images = len(cells) * len(COMBOS)
+
+    ref, chain_s = timed(run_chain, cells, args.repeats)
+    print(f"[cadena]     {n_images / chain_s:10.0f} img/s")
+    for name, fn in [('fusionada', run_fused), ('lote', run_batch), ('lote+mapas', run_batch_maps)]:
+        out, seconds = timed(fn, cells, args.repeats)
+        mad, mad_center, psnr = parity(ref, out)
+        print(f"[{name:<10}] {n_images / seconds:10.0f} img/s (x{chain_s / seconds:.1f}) | "
+              f"dif. media: {mad:.2f} | dif. centro: {mad_center:.2f} | PSNR: {psnr:.1f} dB")
+
+    # Fotométricas sobre las imágenes deformadas, con factores al azar
+    rng = np.random.default_rng(0)
+    factors = [rng.choice(values, len(ref)) for values in (BRIGHTNESS, CONTRASTS, SATURATIONS)]
+    _, single_s = timed(lambda imgs: [single_photometric(img, *f) for img, *f in zip(imgs, *factors)],
+                        ref, args.repeats)
+    _, batch_s = timed(lambda imgs: photometric_batch(imgs, *factors, rng), ref, args.repeats)
+    print(f"[fotom. img] {len(ref) / single_s:10.0f} img/s")
+    print(f"[fotom. lote] {len(ref) / batch_s:9.0f} img/s (x{single_s / batch_s:.1f})")
+
+
+if __name__ == "__main__":
+    main()
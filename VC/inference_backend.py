@@ -0,0 +1,110 @@
+import os
+import numpy as np
+
+# =============================================================================
+# BACKENDS DE INFERENCIA
+# =============================================================================
+# Todos exponen predict(X, batch_size=None, verbose=0) como un modelo de Keras,
+# así que se pueden pasar directamente a las funciones predict_board_position*.
+
+DEFAULT_BATCH_SIZE = 256
+
+
+class KerasBackend:
+    """Modelo de Keras (.h5 / .keras) cargado con tensorflow.keras.models.load_model."""
+
+    def __init__(self, model_path):
+        from tensorflow.keras.models import load_model
+        self.model = load_model(model_path)
+
+    def predict(self, X, batch_size=None, verbose=0):
+        return self.model.predict(X, batch_size=batch_size or DEFAULT_BATCH_SIZE, verbose=verbose)
+
+
+class TFLiteBackend:
+    """
+    Modelo TFLite (.tflite), en float32, float16 o int8.
+    Usa tflite_runtime si está instalado (mucho más ligero) y si no tf.lite de TensorFlow.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = None
+
+    def _resize(self, batch_size):
+        # Solo se reasignan los tensores cuando cambia el tamaño de lote
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input['index'], [batch_size, *self.input['shape'][1:]])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+
+    def _quantize(self, X):
+        scale, zero_point = self.input['quantization']
+        if self.input['dtype'] == np.float32 or scale == 0:
+            return X.astype(self.input['dtype'])
+        info = np.iinfo(self.input['dtype'])
+        return np.clip(np.round(X / scale + zero_point), info.min, info.max).astype(self.input['dtype'])
+
+    def _dequantize(self, y):
+        scale, zero_point = self.output['quantization']
+        if self.output['dtype'] == np.float32 or scale == 0:
+            return y.astype(np.float32)
+        return (y.astype(np.float32) - zero_point) * scale
+
+    def predict(self, X, batch_size=None, verbose=0):
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        preds = []
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            self._resize(len(batch))
+            self.interpreter.set_tensor(self.input['index'], self._quantize(batch))
+            self.interpreter.invoke()
+            preds.append(self._dequantize(self.interpreter.get_tensor(self.output['index'])))
+        return np.concatenate(preds)
+
+
+class OnnxBackend:
+    """Modelo ONNX (.onnx) ejecutado con ONNX Runtime en CPU."""
+
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, X, batch_size=None, verbose=0):
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        preds = []
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size].astype(np.float32)
+            preds.append(self.session.run(None, {self.input_name: batch})[0])
+        return np.concatenate(preds)
+
+
+BACKENDS = {
+    '.h5': KerasBackend,
+    '.keras': KerasBackend,
+    '.tflite': TFLiteBackend,
+    '.onnx': OnnxBackend,
+}
+
+
+def load_backend(model_path):
+    """
+    Carga el modelo con el backend que corresponde a su extensión (.h5/.keras, .tflite, .onnx).
+    :param model_path: Ruta del modelo
+    :return: Objeto con predict(X, batch_size=None, verbose=0)
+    """
+    ext = os.path.splitext(model_path)[1].lower()
+    if ext not in BACKENDS:
+        raise ValueError(f"Formato de modelo no soportado: {model_path}")
+    return BACKENDS[ext](model_path)
@@ -1,8 +1,17 @@
 from aply_filters import apply_filters, augment_filters, all_filters_and_rotations, apply_all_augmentations, all_filters_rotations_and_augmentation
 import os
+import json
+import time
+import hashlib
+import functools
+import types
 import cv2
 from crop_board import crop_and_divide_board
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+CELL_CACHE_VERSION = 2  # Entra en el hash de los shards: súbelo si cambia cómo se recortan las casillas
 
 def load_dataset(dataset_folder, margin_pct=0.05):
     """
@@ -131,14 +140,16 @@ def load_dataset_with_all_filters_and_rotations(dataset_folder, margin_pct=0.05)
                     y.append(label)
     return np.array(X), np.array(y)
 
-def load_fully_augmented_dataset(dataset_folder, margin_pct=0.05):
+def load_fully_augmented_dataset(dataset_folder, margin_pct=0.05, budget=200, seed=None):
     """
     Carga imágenes de tableros y sus etiquetas desde una carpeta.
-    Para cada celda, aplica todos los filtros y augmentaciones definidos en apply_all_augmentations.
+    Para cada celda, genera budget combinaciones al azar de los filtros y augmentaciones definidos
+    en apply_all_augmentations (budget=None las genera todas). seed hace el muestreo reproducible.
     Devuelve dos arrays: imágenes aumentadas y etiquetas correspondientes.
     """
     X = []  # Imágenes aumentadas de casillas
     y = []  # Etiquetas (ground truth)
+    rng = np.random.default_rng(seed)
 
     for fname in os.listdir(dataset_folder):
         if fname.endswith('.jpeg') or fname.endswith('.png'):
@@ -162,9 +173,9 @@ def load_fully_augmented_dataset(dataset_folder, margin_pct=0.05):
                     print(f"Ground truth incorrecto en {txt_path}")
                     continue
 
-            # Aplica augmentación exhaustiva a cada celda
+            # Aplica augmentación muestreada a cada celda
             for cell, label in zip(cells, labels):
-                augmented_cells = apply_all_augmentations(cell)
+                augmented_cells = apply_all_augmentations(cell, budget=budget, seed=rng)
                 for aug_cell in augmented_cells:
                     X.append(aug_cell)
                     y.append(label)
@@ -205,4 +216,278 @@ def load_augmented_dataset(dataset_folder, margin_pct=0.05, extra_per_base=2):
                 for aug_cell in augmented_cells:
                     X.append(aug_cell)
                     y.append(label)
-    return np.array(X), np.array(y)
\ No newline at end of file
+    return np.array(X), np.array(y)
+
+# =============================================================================
+# CACHÉ EN DISCO DE CASILLAS
+# =============================================================================
+
+def build_cell_cache(dataset_folder, cache_dir, margin_pct=0.05):
+    """
+    Construye (o actualiza) una caché en disco con las 64 casillas de cada tablero, redimensionadas
+    a 64x64, y sus etiquetas. Cada tablero se guarda en un shard .npy cuyo nombre es el hash de su
+    contenido (imagen + etiquetas + margen), así que en ejecuciones posteriores solo se leen y se
+    recortan las imágenes nuevas o modificadas. Los shards se concatenan en cells.npy escribiendo
+    uno a uno sobre un memmap, sin tener todo el dataset en memoria.
+    Devuelve dos arrays: casillas (memmap de solo lectura, (N, 64, 64, 3) uint8) y etiquetas.
+    """
+    shards_dir = os.path.join(cache_dir, 'shards')
+    os.makedirs(shards_dir, exist_ok=True)
+
+    keys = []
+    labels = []
+    for fname in sorted(os.listdir(dataset_folder)):
+        if fname.endswith('.jpeg') or fname.endswith('.png'):
+            img_path = os.path.join(dataset_folder, fname)
+            txt_path = img_path.rsplit('.', 1)[0] + '.txt'
+            if not os.path.exists(txt_path):
+                print(f"Ground truth no encontrado para {img_path}")
+                continue
+
+            with open(txt_path, 'r') as f:
+                board_labels = f.read().strip().split()
+                if len(board_labels) != 64:
+                    print(f"Ground truth incorrecto en {txt_path}")
+                    continue
+            with open(img_path, 'rb') as f:
+                data = f.read()
+
+            key = hashlib.sha1(data + ' '.join(board_labels).encode() + str(margin_pct).encode()
+                               + str(CELL_CACHE_VERSION).encode()).hexdigest()
+            shard_path = os.path.join(shards_dir, key + '.npy')
+            if not os.path.exists(shard_path):
+                # Imagen nueva o modificada: se decodifica y se recorta solo esta
+                img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if img is None:
+                    print(f"No se pudo leer {img_path}")
+                    continue
+                try:
+                    cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
+                except ValueError as e:
+                    print(f"{img_path}: {e}")
+                    continue
+                tmp_path = shard_path + '.tmp.npy'
+                np.save(tmp_path, np.stack([cv2.resize(cell, (64, 64)) for cell in cells]))
+                os.replace(tmp_path, shard_path)
+
+            keys.append(key)
+            labels.extend(board_labels)
+
+    # Solo se reescribe cells.npy si ha cambiado la lista de tableros
+    manifest = json.dumps({'keys': keys, 'margin_pct': margin_pct})
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    cells_path = os.path.join(cache_dir, 'cells.npy')
+    labels_path = os.path.join(cache_dir, 'labels.npy')
+    old_manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            old_manifest = f.read()
+
+    if manifest != old_manifest or not os.path.exists(cells_path):
+        tmp_path = cells_path + '.tmp.npy'
+        X = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(64 * len(keys), 64, 64, 3))
+        for i, key in enumerate(keys):
+            X[i * 64:(i + 1) * 64] = np.load(os.path.join(shards_dir, key + '.npy'), mmap_mode='r')
+        X.flush()
+        del X
+        os.replace(tmp_path, cells_path)
+        np.save(labels_path, np.array(labels))
+        with open(manifest_path, 'w') as f:
+            f.write(manifest)
+
+    return np.load(cells_path, mmap_mode='r'), np.load(labels_path)
+
+
+def augment_cell(cell, augment):
+    """
+    Aplica augment a una casilla y devuelve siempre un array (n, 64, 64, C): apply_filters produce
+    una sola imagen y el resto de funciones una lista. Con augment=None devuelve la casilla tal cual.
+    """
+    if augment is None:
+        return cell[None]
+    augmented = np.asarray(augment(cell))
+    return augmented[None] if augmented.ndim == 3 else augmented
+
+
+def _code_digest(code, h):
+    # Bytecode, nombres y constantes de la función y de sus funciones internas (sin direcciones de memoria)
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _code_digest(const, h)
+        else:
+            h.update(repr(const).encode())
+
+
+def _args_repr(args, kwargs):
+    # Las funciones pasadas como argumento se representan por su clave (su repr lleva la dirección de memoria)
+    value = lambda v: augment_cache_key(v) if callable(v) else repr(v)
+    return repr([value(v) for v in args] + [(k, value(v)) for k, v in sorted(kwargs.items())])
+
+
+def augment_cache_key(augment):
+    """
+    Clave de caché de una función de aumento: su nombre y un hash de su código, sus valores por defecto
+    y, si es un functools.partial, sus argumentos fijos. Cambia al editar la función o sus parámetros,
+    pero no al editar otras funciones a las que llame: en ese caso hay que pasar augment_key.
+    """
+    h = hashlib.sha1()
+    while isinstance(augment, functools.partial):
+        h.update(_args_repr(augment.args, augment.keywords).encode())
+        augment = augment.func
+    code = getattr(augment, '__code__', None)
+    if code is not None:
+        _code_digest(code, h)
+        h.update(_args_repr(augment.__defaults__ or (), augment.__kwdefaults__ or {}).encode())
+    name = getattr(augment, '__name__', type(augment).__name__).strip('<>')  # '<lambda>' no vale en Windows
+    return f"{name}_{h.hexdigest()[:12]}"
+
+
+def load_cached_dataset(dataset_folder, cache_dir, margin_pct=0.05, augment=None, augment_key=None):
+    """
+    Carga el dataset desde la caché de build_cell_cache, actualizándola antes si hace falta.
+    Sin augment devuelve directamente las casillas como memmap (sin copiarlas a memoria).
+    Con augment (por ejemplo apply_filters o all_filters_and_rotations, o un functools.partial)
+    aplica la función a cada casilla y escribe el resultado en otro memmap en disco, que se
+    reutiliza mientras no cambien los tableros ni la clave del aumento.
+    La clave es augment_key si se da y, si no, augment_cache_key(augment), que no ve los cambios
+    en las funciones a las que llama augment: para esos casos, pasa una augment_key nueva (p. ej. con
+    un número de versión).
+    Los aumentos aleatorios se generan una sola vez y se guardan: todas las épocas ven la misma
+    muestra. Para otra muestra hay que cambiar augment_key.
+    Devuelve dos arrays: imágenes (memmap) y etiquetas correspondientes.
+    """
+    X, y = build_cell_cache(dataset_folder, cache_dir, margin_pct=margin_pct)
+    if augment is None:
+        return X, y
+
+    with open(os.path.join(cache_dir, 'manifest.json'), 'r') as f:
+        version = hashlib.sha1(f.read().encode()).hexdigest()[:12]
+    key = augment_key or augment_cache_key(augment)
+    out_path = os.path.join(cache_dir, f"{key}_{version}.npy")
+
+    n_aug = len(augment_cell(X[0], augment))
+    if not os.path.exists(out_path):
+        tmp_path = out_path + '.tmp.npy'
+        shape = augment_cell(X[0], augment).shape[1:]
+        X_aug = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(len(X) * n_aug,) + shape)
+        for i in range(len(X)):
+            X_aug[i * n_aug:(i + 1) * n_aug] = augment_cell(X[i], augment)
+        X_aug.flush()
+        del X_aug
+        os.replace(tmp_path, out_path)
+
+    return np.load(out_path, mmap_mode='r'), np.repeat(y, n_aug)
+
+# =============================================================================
+# CARGA EN PARALELO
+# =============================================================================
+
+def _init_worker():
+    # Cada proceso usa un solo hilo de OpenCV para no competir por los núcleos con los demás
+    cv2.setNumThreads(1)
+
+
+def _load_board_worker(task):
+    """
+    Procesa un tablero en un proceso del pool: lee la imagen, detecta y recorta las casillas,
+    aplica el aumento y escribe el resultado en su hueco de la memoria compartida.
+    Devuelve (índice, etiquetas o None si falla, tiempos por etapa).
+    """
+    i, img_path, txt_path, margin_pct, augment, shm_name, shape = task
+    timings = {}
+
+    start = time.perf_counter()
+    with open(txt_path, 'r') as f:
+        labels = f.read().strip().split()
+    img = cv2.imread(img_path)
+    timings['lectura'] = time.perf_counter() - start
+    if img is None or len(labels) != 64:
+        print(f"No se pudo cargar {img_path}")
+        return i, None, timings
+
+    start = time.perf_counter()
+    try:
+        cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
+    except ValueError as e:
+        print(f"{img_path}: {e}")
+        return i, None, timings
+    timings['recorte'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    board = np.stack([augment_cell(cv2.resize(cell, (64, 64)), augment) for cell in cells])
+    timings['aumento'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    out = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    out[i] = board.reshape(shape[1:])
+    del out
+    shm.close()
+    timings['copia'] = time.perf_counter() - start
+    return i, labels, timings
+
+
+def load_dataset_parallel(dataset_folder, margin_pct=0.05, augment=None, workers=None):
+    """
+    Carga el dataset repartiendo los tableros entre un pool de procesos.
+    Cada proceso escribe sus casillas (aumentadas con augment, o solo redimensionadas a 64x64 si es None)
+    en un bloque de memoria compartida, en el hueco que le corresponde a su tablero, así que el orden
+    es siempre el de los nombres de archivo ordenados, independientemente de qué proceso acabe antes.
+    Al terminar imprime el tiempo total de cada etapa (sumado entre procesos) y el tiempo real.
+    Devuelve (imágenes, etiquetas, shm). Las imágenes son una vista de la memoria compartida shm, sin
+    copia: los tableros que fallan se quitan moviendo los siguientes hacia delante dentro del mismo bloque.
+    Quien llama se encarga de liberarla cuando ya no use las imágenes:
+        X, y, shm = load_dataset_parallel(...)
+        ...
+        del X
+        shm.close()
+        shm.unlink()
+    """
+    wall_start = time.perf_counter()
+    boards = []
+    for fname in sorted(os.listdir(dataset_folder)):
+        if fname.endswith('.jpeg') or fname.endswith('.png'):
+            img_path = os.path.join(dataset_folder, fname)
+            txt_path = img_path.rsplit('.', 1)[0] + '.txt'
+            if not os.path.exists(txt_path):
+                print(f"Ground truth no encontrado para {img_path}")
+                continue
+            boards.append((img_path, txt_path))
+    if not boards:
+        return np.empty((0, 64, 64, 3), np.uint8), np.array([]), None
+
+    # Forma de la salida de un tablero, a partir de una casilla vacía
+    cell_shape = augment_cell(np.zeros((64, 64, 3), np.uint8), augment).shape
+    shape = (len(boards), 64 * cell_shape[0]) + cell_shape[1:]
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+    try:
+        tasks = [(i, img_path, txt_path, margin_pct, augment, shm.name, shape)
+                 for i, (img_path, txt_path) in enumerate(boards)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            results = list(executor.map(_load_board_worker, tasks))
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+
+    # Se quitan los tableros que han fallado sin copiar el resto: cada tablero válido se mueve a la
+    # primera posición libre (nunca hacia atrás, así que no pisa ninguno pendiente) y se devuelve el principio
+    X_shared = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    valid = [i for i, labels, _ in results if labels is not None]
+    for k, i in enumerate(valid):
+        if k != i:
+            X_shared[k] = X_shared[i]
+    X = X_shared[:len(valid)].reshape((-1,) + cell_shape[1:])
+    y = np.array([label for _, labels, _ in results if labels is not None
+                  for label in labels for _ in range(cell_shape[0])])
+
+    stages = {}
+    for _, _, timings in results:
+        for stage, seconds in timings.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+    wall = time.perf_counter() - wall_start
+    print(f"Tableros: {len(valid)}/{len(boards)} | Tiempo real: {wall:.2f} s | " +
+          " | ".join(f"{stage}: {seconds:.2f} s" for stage, seconds in stages.items()))
+    return X, y, shm
@@ -1,7 +1,7 @@
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
 import matplotlib.pyplot as plt
+from inference_backend import load_backend
 
 # Importa tus funciones de predicción
 from prediction import (
@@ -16,7 +16,7 @@ def predict_and_print_board(img_path, model_path, predict_func, margin_pct=0.05,
     
     Args:
         img_path (str): Ruta de la imagen del tablero.
-        model_path (str): Ruta del modelo Keras.
+        model_path (str): Ruta del modelo (.h5, .tflite o .onnx).
         predict_func (callable): Función de predicción a usar.
         margin_pct (float): Margen para recorte del tablero.
         show_img (bool): Si True, muestra la imagen original.
@@ -26,7 +26,7 @@ def predict_and_print_board(img_path, model_path, predict_func, margin_pct=0.05,
         list: Lista de 64 etiquetas predichas.
     """
     # Cargar modelo
-    model = load_model(model_path)
+    model = load_backend(model_path)
     
     # Cargar imagen
     img = cv2.imread(img_path)
@@ -1,23 +1,33 @@
 import numpy as np
-from crop_board import crop_and_divide_board
+from crop_board import crop_and_divide_board, detect_and_crop_board
 import matplotlib.pyplot as plt
 import numpy as np
-from aply_filters import apply_filters, augment_filters, all_filters_and_rotations
+from aply_filters import (
+    apply_filters, augment_filters, all_filters_and_rotations, all_filters_and_rotations_batch,
+    board_apply_filters, board_filters_and_rotations
+)
 
-def predict_board_position(img, model, margin_pct=0.05):
+def predict_board_position(img, model, margin_pct=0.05, per_cell_borders=True):
     """
     Dada una imagen de un tablero, devuelve la posición predicha (lista de 64 etiquetas).
     :param img: imagen del tablero (BGR)
     :param model: modelo CNN entrenado
     :param margin_pct: margen para recorte de tablero
+    :param per_cell_borders: si True, filtra cada casilla por separado (bordes por casilla, como en
+                             el entrenamiento); si False, filtra el tablero completo una sola vez
     :return: lista de 64 etiquetas predichas
     """
-    # 1. Divide la imagen en 64 casillas
-    cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
-    
-    # 2. Aplica los mismos filtros/preprocesado que en el entrenamiento
-    X_pred = [apply_filters(cell) for cell in cells]
-    X_pred = np.array(X_pred) / 255.0  # Normaliza igual que en el entrenamiento
+    if per_cell_borders:
+        # 1. Divide la imagen en 64 casillas
+        cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
+
+        # 2. Aplica los mismos filtros/preprocesado que en el entrenamiento
+        X_pred = [apply_filters(cell) for cell in cells]
+        X_pred = np.array(X_pred) / 255.0  # Normaliza igual que en el entrenamiento
+    else:
+        # 1-2. Filtra el tablero completo y toma las 64 casillas como vistas
+        board = detect_and_crop_board(img, margin_pct=margin_pct)
+        X_pred = board_apply_filters(board).reshape(-1, 64, 64, 5) / 255.0
     
     # 3. Predice las clases
     preds = model.predict(X_pred)
@@ -68,33 +78,44 @@ def predict_board_position_tta(img, model, margin_pct=0.05):
     return predicted_labels
 
 
-def predict_board_position_all_filters_rotations(img, model, margin_pct=0.05):
+def predict_tta_batch(augmented, model, batch_size=256):
     """
-    Predice la posición del tablero usando test-time augmentation (TTA) consistente con el entrenamiento
-    con all_filters_and_rotations: para cada celda, aplica todos los filtros y rotaciones,
-    promedia las predicciones y elige la clase más probable.
+    Predice un lote de casillas ya aumentadas (n_cells, n_aug, 64, 64, 3) con una sola llamada a
+    model.predict, promedia las predicciones de cada casilla y devuelve sus etiquetas.
     """
-    # 1. Divide la imagen en 64 casillas
-    cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
-
-    all_preds = []
-    for cell in cells:
-        # Genera todas las versiones aumentadas (filtros + rotaciones)
-        augmented_cells = all_filters_and_rotations(cell)  # Lista de imágenes (N, 64, 64, 3)
-        # Preprocesa y normaliza (si apply_filters es necesario, si no, puedes omitirlo)
-        aug_X = np.array([aug_cell for aug_cell in augmented_cells]) / 255.0
-        # Predice para cada augmentación
-        preds = model.predict(aug_X, verbose=0)  # (N, n_classes)
-        # Promedia las predicciones
-        mean_pred = np.mean(preds, axis=0)  # (n_classes,)
-        all_preds.append(mean_pred)
+    n_cells, n_aug = augmented.shape[:2]
+    aug_X = augmented.reshape(-1, 64, 64, 3).astype(np.float32) / 255.0  # (n_cells * n_aug, 64, 64, 3)
 
-    all_preds = np.array(all_preds)  # (64, n_classes)
+    preds = model.predict(aug_X, batch_size=batch_size, verbose=0)  # (n_cells * n_aug, n_classes)
+    all_preds = preds.reshape(n_cells, n_aug, -1).mean(axis=1)  # (n_cells, n_classes)
     class_indices = np.argmax(all_preds, axis=1)
 
     idx_to_piece = {
         0: '.', 1: 'P', 2: 'N', 3: 'B', 4: 'R', 5: 'Q', 6: 'K',
         7: 'p', 8: 'n', 9: 'b', 10: 'r', 11: 'q', 12: 'k'
     }
-    predicted_labels = [idx_to_piece[idx] for idx in class_indices]
-    return predicted_labels
\ No newline at end of file
+    return [idx_to_piece[idx] for idx in class_indices]
+
+
+def predict_board_position_all_filters_rotations(img, model, margin_pct=0.05, batch_size=256, per_cell_borders=True):
+    """
+    Predice la posición del tablero usando test-time augmentation (TTA) consistente con el entrenamiento
+    con all_filters_and_rotations: para cada celda, aplica todos los filtros y rotaciones,
+    promedia las predicciones y elige la clase más probable.
+    Todas las versiones aumentadas de las 64 casillas se apilan en un único tensor
+    (64 * n_aug, 64, 64, 3) y se predicen con una sola llamada a model.predict.
+    Con per_cell_borders=False los filtros se aplican una sola vez sobre el tablero completo.
+    """
+    if per_cell_borders:
+        # 1. Divide la imagen en 64 casillas
+        cells = crop_and_divide_board(img, margin_pct=margin_pct, debug=False)
+
+        # 2. Genera todas las versiones aumentadas (filtros + rotaciones) de todas las casillas a la vez
+        augmented = all_filters_and_rotations_batch(cells)  # (64, n_aug, 64, 64, 3)
+    else:
+        # 1-2. Filtra el tablero completo una sola vez y genera las rotaciones de cada casilla
+        board = detect_and_crop_board(img, margin_pct=margin_pct)
+        augmented = board_filters_and_rotations(board)  # (64, n_aug, 64, 64, 3)
+
+    # 3-4. Predice todas las augmentaciones en una sola pasada y promedia por casilla
+    return predict_tta_batch(augmented, model, batch_size=batch_size)
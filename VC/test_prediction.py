@@ -0,0 +1,23 @@
+import numpy as np
+import prediction
+
+
+class FakeModel:
+    """Modelo de prueba: da la clase 2 (caballo blanco) a todas las casillas y guarda el lote que recibe."""
+
+    def predict(self, X, batch_size=None, verbose=0):
+        self.shape = X.shape
+        preds = np.zeros((len(X), 13), dtype=np.float32)
+        preds[:, 2] = 1.0
+        return preds
+
+
+def test_whole_board_tta(monkeypatch):
+    board = np.random.default_rng(0).integers(0, 256, (512, 512, 3), dtype=np.uint8)
+    monkeypatch.setattr(prediction, 'detect_and_crop_board', lambda img, margin_pct: board)
+    model = FakeModel()
+
+    labels = prediction.predict_board_position_all_filters_rotations(board, model, per_cell_borders=False)
+
+    assert labels == ['N'] * 64
+    assert model.shape[0] % 64 == 0 and model.shape[1:] == (64, 64, 3)
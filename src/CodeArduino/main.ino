@@ -6,6 +6,30 @@ const int electroimanPin = 7;  // Pin para el electroimán
 const int steps = 289;
 int stepDelay = 4000;
 
+// Posición de cada motor en medias casillas, para los carriles entre casillas. 289 pasos no es par:
+// cada media casilla da los pasos que faltan hasta la posición exacta, así dos medias suman una casilla
+long medias1 = 0;
+long medias2 = 0;
+
+// Pasos desde el origen hasta una posición en medias casillas (redondeando hacia abajo)
+long pasosHasta(long medias) {
+  long total = medias * steps;
+  return total >= 0 ? total / 2 : -((-total + 1) / 2);
+}
+
+// Mueve un motor media casilla en el sentido indicado (+1 o -1)
+void moverMedia(int dirPin, int stepPin, int nivelDir, long &medias, int sentido) {
+  long pasos = abs(pasosHasta(medias + sentido) - pasosHasta(medias));
+  digitalWrite(dirPin, nivelDir);
+  for (long x = 0; x < pasos; x++) {
+    digitalWrite(stepPin, HIGH);
+    delayMicroseconds(stepDelay);
+    digitalWrite(stepPin, LOW);
+    delayMicroseconds(stepDelay);
+  }
+  medias += sentido;
+}
+
 void setup() {
   Serial.begin(9600); // Inicializa la comunicación serial
   pinMode(dirPin1, OUTPUT);
@@ -39,6 +63,7 @@ void loop() {
         digitalWrite(stepPin1, LOW);
         delayMicroseconds(stepDelay);
       }
+      medias1 -= 2;
     }
     // Motor 1 atrás
     if (comando == 'd') {
@@ -49,6 +74,7 @@ void loop() {
         digitalWrite(stepPin1, LOW);
         delayMicroseconds(stepDelay);
       }
+      medias1 += 2;
     }
     // Motor 2 adelante
     if (comando == 'w') {
@@ -59,6 +85,7 @@ void loop() {
         digitalWrite(stepPin2, LOW);
         delayMicroseconds(stepDelay);
       }
+      medias2 -= 2;
     }
     // Motor 2 atrás
     if (comando == 's') {
@@ -69,6 +96,13 @@ void loop() {
         digitalWrite(stepPin2, LOW);
         delayMicroseconds(stepDelay);
       }
+      medias2 += 2;
     }
+
+    // Media casilla, para entrar y salir de los carriles entre casillas
+    if (comando == 'A') moverMedia(dirPin1, stepPin1, HIGH, medias1, -1);
+    if (comando == 'D') moverMedia(dirPin1, stepPin1, LOW, medias1, 1);
+    if (comando == 'W') moverMedia(dirPin2, stepPin2, HIGH, medias2, -1);
+    if (comando == 'S') moverMedia(dirPin2, stepPin2, LOW, medias2, 1);
   }
 }
\ No newline at end of file
@@ -1,6 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS  
-from modulo_central import movimiento_completo
+from modulo_central import movimiento_completo, cementerio
 
 app = Flask(__name__)
 CORS(app)  # ✅ Permite CORS desde cualquier origen
@@ -21,5 +21,11 @@ def mover_pieza():
 
     return jsonify({"status": "ok", "mensaje": f"Movimiento simulado: {origen} -> {destino}"}), 200
 
+# Después de recoger a mano las piezas capturadas (por ejemplo, al empezar otra partida)
+@app.route("/vaciar_cementerio", methods=["POST"])
+def vaciar_cementerio():
+    cementerio.vaciar()
+    return jsonify({"status": "ok", "mensaje": "Cementerio vacío"}), 200
+
 if __name__ == "__main__":
     app.run(port=5000)
\ No newline at end of file
@@ -69,4 +69,46 @@ class GameState:
         for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
             nx, ny = x + dx, y + dy
             if self.coordenada_valida(nx, ny):
-                yield nx, ny
\ No newline at end of file
+                yield nx, ny
+
+
+'''
+Cementerio: huecos fuera del tablero donde el robot deja las piezas capturadas.
+'''
+class Cementerio:
+
+    '''
+    Función de inicialización de las variables.
+    - columnas: columnas de huecos de cada lado del tablero, de la más exterior a la más interior
+      (por defecto x = 9, 8 a la derecha y x = -2, -1 a la izquierda: 32 huecos)
+    - huecos: pieza guardada en cada hueco (x, y)
+    '''
+    def __init__(self, columnas=((9, 8), (-2, -1))):
+        self.columnas = columnas
+        self.huecos = {}
+
+    '''
+    Huecos que se pueden ocupar ahora: en cada fila y lado, el más exterior que siga libre.
+    Así las piezas ya guardadas nunca tapan la entrada a los huecos que quedan.
+    '''
+    def huecos_libres(self):
+        libres = []
+        for columnas in self.columnas:
+            for y in range(8):
+                for x in columnas:
+                    if (x, y) not in self.huecos:
+                        libres.append((x, y))
+                        break
+        return libres
+
+    # Columnas mínima y máxima que ocupa el área del robot contando el cementerio
+    def limites_x(self):
+        columnas = [x for lado in self.columnas for x in lado] + [0, 7]
+        return min(columnas), max(columnas)
+
+    def guardar(self, hueco, pieza):
+        self.huecos[hueco] = pieza
+
+    # Se llama cuando se recoge el cementerio a mano (por ejemplo, al empezar otra partida)
+    def vaciar(self):
+        self.huecos.clear()
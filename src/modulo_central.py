@@ -1,6 +1,15 @@
-from game_state import GameState
-from collections import deque
+import time
+from game_state import GameState, Cementerio
 from motor_control import ejecutar_movimiento_completo
+from planificador import (DIRECCIONES, LADO_RETICULA, ModeloCoste, planificar, explorar, a_nodo, a_coordenadas,
+                          choques_reticula)
+
+def copiar_estado(estado):
+    """Copia de un GameState para simular movimientos sin tocar el original"""
+    copia = GameState()
+    copia.board = [fila[:] for fila in estado.board]
+    copia.current_player = estado.current_player
+    return copia
 
 '''
 Central Module: clase que controla el estado de la partida y se comunica con el resto de módulos.
@@ -13,142 +22,312 @@ class CentralModule:
     - ia_endpoint: dirección con la que se comunica el módulo central con el módulo del modelo de IA
     - vision_module: objeto de la clase Vision Module que se encarga del procesado de las imágenes del tablero
     - movement_module: objeto de la clase Movement Module que se encarga de realizar los movimientos del robot
+    - modelo_coste: tiempos del robot con los que el planificador elige los caminos
+    - usar_carriles: planificar sobre la retícula de media casilla, deslizando las piezas por las líneas entre casillas.
+      Desactivado por defecto: activarlo solo con el diámetro medido del juego y el firmware de media casilla
+    - diametro_pieza: diámetro de la base de las piezas en casillas; por un carril entre dos piezas solo cabe
+      una pieza de menos de media casilla (medir con el juego de piezas real)
+    - usar_borde: permitir mover piezas por el borde exterior del tablero
+    - cementerio: huecos fuera del tablero para las piezas capturadas (se conserva entre jugadas)
     '''
-    def __init__(self):
+    def __init__(self, modelo_coste=None, usar_carriles=False, diametro_pieza=0.45, usar_borde=True, cementerio=None):
         self.game_state = GameState()
+        self.cementerio = cementerio or Cementerio()
+        self.modelo_coste = modelo_coste or ModeloCoste()
+        self.usar_carriles = usar_carriles
+        self.diametro_pieza = diametro_pieza
+        self.usar_borde = usar_borde
 
-    # BFS para encontrar un camino libre de obstáculos (solo en casillas vacías)
-    def encontrar_camino_simple(self, origen, destino):
-        visitado = set()
-        cola = deque()
-        cola.append((origen, []))
+    def _cuadricula(self, estado, ignorar, con_cementerio=False):
+        """
+        Cuadrícula sobre la que se planifica: (lado, longitud_paso, bloqueos), con bloqueos un dict
+        nodo -> casillas cuyas piezas impiden pasar por él. Con usar_carriles es la retícula 17x17 y si no,
+        las 8x8 casillas. Las piezas de las casillas de ignorar no cuentan (la que se mueve, el destino).
+        con_cementerio: también cuentan las piezas del cementerio (caminos que salen del tablero)
+        """
+        ocupadas = [(x, y) for y in range(8) for x in range(8) if not estado.is_empty(x, y) and (x, y) not in ignorar]
+        if con_cementerio:
+            ocupadas += list(self.cementerio.huecos)
+        if self._con_carriles():
+            return LADO_RETICULA, 0.5, choques_reticula(ocupadas, self.diametro_pieza, self.usar_borde or con_cementerio)
+        return 8, 1.0, {casilla: [casilla] for casilla in ocupadas}
 
-        while cola:
-            (x, y), camino = cola.popleft()
-            if (x, y) == destino:
-                return camino + [(x, y)]
+    def _limites(self, con_cementerio):
+        # Área de búsqueda: el tablero o, para llevar piezas al cementerio, también las columnas de los lados
+        if not con_cementerio:
+            return None
+        x_min, x_max = self.cementerio.limites_x()
+        if self._con_carriles():
+            return 2 * x_min, 2 * x_max + 3, 0, LADO_RETICULA
+        return x_min, x_max + 1, 0, 8
 
-            if (x, y) in visitado:
-                continue
-            visitado.add((x, y))
+    def _con_carriles(self):
+        # Una pieza de media casilla o más no cabe entre dos piezas: la retícula no aporta nada y es más lenta
+        return self.usar_carriles and self.diametro_pieza < 0.5
 
-            for nx, ny in self.game_state.vecinos(x, y):
-                if self.game_state.is_empty(nx, ny) or (nx, ny) == destino:
-                    cola.append(((nx, ny), camino + [(x, y)]))
+    def _nodo(self, casilla):
+        return a_nodo(casilla) if self._con_carriles() else casilla
 
-        return None  # No se encontró camino
-    
-    def detectar_bloqueadores(self, origen, destino):
-        """Detecta qué piezas bloquean el camino directo entre origen y destino"""
-        visitado = set()
-        cola = deque()
-        cola.append((origen, []))
-
-        bloqueadores = set()
-
-        while cola:
-            (x, y), camino = cola.popleft()
-            if (x, y) == destino:
-                return list(bloqueadores)
-
-            if (x, y) in visitado:
-                continue
-            visitado.add((x, y))
-
-            for nx, ny in self.game_state.vecinos(x, y):
-                if not self.game_state.is_empty(nx, ny) and (nx, ny) != destino:
-                    bloqueadores.add((nx, ny))
-                elif self.game_state.is_empty(nx, ny) or (nx, ny) == destino:
-                    cola.append(((nx, ny), camino + [(x, y)]))
-
-        return list(bloqueadores)
-
-    def buscar_casilla_temporal(self, bloqueador, destino, max_depth=2):
-        """Busca casillas vacías accesibles desde la posición del bloqueador en 1 o 2 movimientos"""
-        visitado = set()
-        cola = deque()
-        cola.append((bloqueador, []))
-        resultados = []
-
-        while cola:
-            (x, y), camino = cola.popleft()
-            if len(camino) > max_depth:
-                continue
-            if (x, y) != bloqueador and self.game_state.is_empty(x, y):
-                resultados.append(camino)
-
-            for nx, ny in self.game_state.vecinos(x, y):
-                if (nx, ny) not in visitado and self.game_state.is_empty(nx, ny) and (nx, ny) != destino:
-                    visitado.add((nx, ny))
-                    cola.append(((nx, ny), camino + [(nx, ny)]))
-        return resultados
+    def _camino_casillas(self, camino):
+        return [a_coordenadas(nodo) for nodo in camino] if self._con_carriles() else camino
 
-    
-    def mover_temporalmente_y_continuar(self, origen, destino):
-        bloqueadores = self.detectar_bloqueadores(origen, destino)
+    # Camino más rápido con la pieza enganchada, sin chocar con otras piezas (de estado o de la partida)
+    def encontrar_camino_simple(self, origen, destino, estado=None, con_cementerio=False):
+        estado = estado or self.game_state
+        lado, longitud, bloqueos = self._cuadricula(estado, (origen, destino), con_cementerio)
+        camino, _ = planificar(self._nodo(origen), self._nodo(destino), lambda u, v: (u, v) not in bloqueos,
+                               self.modelo_coste, lado=lado, longitud_paso=longitud,
+                               limites=self._limites(con_cementerio))
+        return self._camino_casillas(camino) if camino else None  # None si no se encontró camino
 
-        if not bloqueadores:
-            print("No hay bloqueadores directos.")
+    def detectar_bloqueadores(self, origen, destino, estado=None, con_cementerio=False):
+        """
+        Detecta qué piezas bloquean el camino entre origen y destino. Primero van las que atraviesa el camino
+        más barato cuando se permite pasar por encima de piezas con una penalización mayor que cualquier camino
+        libre (mínimo número de bloqueadores y, a igualdad, mínimo tiempo). Después, el resto de piezas que
+        rodean la zona alcanzable desde el origen, de la más prometedora a la menos
+        """
+        estado = estado or self.game_state
+        modelo = self.modelo_coste
+        lado, longitud, bloqueos = self._cuadricula(estado, (origen, destino), con_cementerio)
+        limites = self._limites(con_cementerio) or (0, lado, 0, lado)
+        nodos = (limites[1] - limites[0]) * (limites[3] - limites[2])
+        penalizacion = nodos * (longitud * modelo.paso_iman + modelo.giro)
+        camino, _ = planificar(self._nodo(origen), self._nodo(destino), lambda u, v: True, modelo,
+                               coste_casilla=lambda u, v: penalizacion * len(bloqueos.get((u, v), ())),
+                               lado=lado, longitud_paso=longitud, limites=limites)
+        en_camino = []
+        for nodo in camino or []:
+            for casilla in bloqueos.get(nodo, ()):
+                if casilla not in en_camino and 0 <= casilla[0] < 8:
+                    en_camino.append(casilla)
+
+        # Piezas que rodean la zona alcanzable, ordenadas por tiempo hasta ellas más la estimación hasta el destino
+        inicio = self._nodo(origen)
+        alcanzables = explorar(inicio, lambda u, v: (u, v) not in bloqueos, modelo, lado=lado, longitud_paso=longitud,
+                               limites=limites)
+        alcanzables[inicio] = ([inicio], 0.0)
+        frontera = {}
+        for (u, v), (_, tiempo) in alcanzables.items():
+            for du, dv in DIRECCIONES:
+                for casilla in bloqueos.get((u + du, v + dv), ()):
+                    # Las piezas del cementerio no se apartan
+                    if casilla not in en_camino and 0 <= casilla[0] < 8:
+                        estimado = tiempo + longitud * modelo.paso_iman + modelo.estimacion(casilla, destino)
+                        frontera[casilla] = min(estimado, frontera.get(casilla, float('inf')))
+        return en_camino + sorted(frontera, key=frontera.get)
+
+    def buscar_casilla_temporal(self, bloqueador, destino, max_depth=2, estado=None):
+        """Caminos a las casillas vacías accesibles desde el bloqueador en como mucho max_depth casillas de recorrido, del más rápido al más lento"""
+        estado = estado or self.game_state
+        lado, longitud, bloqueos = self._cuadricula(estado, (bloqueador,))
+        prohibido = self._nodo(destino)
+        alcanzables = explorar(self._nodo(bloqueador), lambda u, v: (u, v) not in bloqueos and (u, v) != prohibido,
+                               self.modelo_coste, max_pasos=int(max_depth / longitud), lado=lado, longitud_paso=longitud)
+        # Solo valen como destino temporal los centros de casilla
+        caminos = [(camino, tiempo) for nodo, (camino, tiempo) in alcanzables.items()
+                   if not self._con_carriles() or nodo[0] % 2 and nodo[1] % 2]
+        return [self._camino_casillas(camino)[1:] for camino, _ in sorted(caminos, key=lambda resultado: resultado[1])]
+
+    def completar_plan(self, origen, destino, temporales, estado, con_cementerio=False):
+        """
+        Con los bloqueadores ya apartados en estado, busca el movimiento principal y la vuelta de cada
+        pieza apartada a su casilla (en orden inverso). Devuelve el plan o None si algún tramo no tiene camino.
+        con_cementerio: el destino es un hueco del cementerio y la pieza sale del tablero
+        """
+        principal = self.encontrar_camino_simple(origen, destino, estado, con_cementerio)
+        if not principal:
             return None
+        despues = copiar_estado(estado)
+        if con_cementerio:
+            despues.board[origen[1]][origen[0]] = '.'
+        else:
+            despues.update_board(origen, destino)
+        retornos = []
+        for temporal in reversed(temporales):
+            retorno = self.encontrar_camino_simple(temporal[-1], temporal[0], despues)
+            if not retorno:
+                return None
+            despues.update_board(temporal[-1], temporal[0])
+            retornos.append(retorno)
+        tiempo = self.modelo_coste.tiempo_tramos(temporales + [principal] + retornos)
+        return {"temporales": temporales, "principal": principal, "retornos": retornos, "tiempo": tiempo}
 
-        for bloqueador in bloqueadores:
-            caminos_temporales = self.buscar_casilla_temporal(bloqueador, destino, max_depth=2)
+    def mover_temporalmente_y_continuar(self, origen, destino, max_reubicaciones=3, ancho=8, candidatos=4,
+                                        max_depth=3, limite_tiempo=1.0, estado=None, con_cementerio=False, fin=None):
+        """
+        Búsqueda en haz sobre secuencias de hasta max_reubicaciones piezas apartadas temporalmente.
+        En cada nivel se amplían los ancho planes parciales más prometedores (tiempo ya gastado más una cota
+        del resto) con candidatos bloqueadores x candidatos casillas temporales, y se guarda el plan completo
+        más rápido que despeja el camino y devuelve todas las piezas a su sitio. La búsqueda se corta al
+        pasar limite_tiempo segundos y se devuelve el mejor plan encontrado hasta entonces.
+        - fin: instante (time.perf_counter) en que se corta la búsqueda, en lugar de limite_tiempo; así varias
+          búsquedas de una misma jugada comparten un único límite
+        - estado: tablero de partida, si no es el de la partida (p. ej. con la pieza capturada ya retirada)
+        - con_cementerio: el destino es un hueco del cementerio (retirar una pieza capturada)
+        - return {"temporales": [...], "principal": [...], "retornos": [...], "tiempo": s} o None
+        """
+        fin = fin if fin is not None else time.perf_counter() + limite_tiempo
+        modelo = self.modelo_coste
+        mejor = None
+        nivel = [(0.0, copiar_estado(estado or self.game_state), [])]
+        vistos = set()
 
-            for camino_temporal in caminos_temporales:
-                if not camino_temporal:
-                    continue
+        for profundidad in range(max_reubicaciones):
+            siguientes = []
+            for _, estado, temporales in nivel:
+                for bloqueador in self.detectar_bloqueadores(origen, destino, estado, con_cementerio)[:candidatos]:
+                    for camino in self.buscar_casilla_temporal(bloqueador, destino, max_depth, estado)[:candidatos]:
+                        if time.perf_counter() > fin:
+                            print("Límite de tiempo de planificación alcanzado.")
+                            return mejor
+                        nuevo = copiar_estado(estado)
+                        nuevo.update_board(bloqueador, camino[-1])
+                        clave = tuple(map(tuple, nuevo.board))
+                        if clave in vistos:
+                            continue
+                        vistos.add(clave)
+                        nuevos_temporales = temporales + [[bloqueador] + camino]
 
-                destino_temporal = camino_temporal[-1]
-                # Simula mover bloqueador a posición temporal
-                self.game_state.update_board(bloqueador, destino_temporal)
+                        plan = self.completar_plan(origen, destino, nuevos_temporales, nuevo, con_cementerio)
+                        if plan and (mejor is None or plan["tiempo"] < mejor["tiempo"]):
+                            mejor = plan
 
-                camino_principal = self.encontrar_camino_simple(origen, destino)
+                        # Cota inferior del plan si se sigue ampliando: lo gastado, el principal y las vueltas
+                        cota = modelo.tiempo_tramos(nuevos_temporales) + modelo.estimacion(origen, destino)
+                        cota += sum(modelo.estimacion(t[-1], t[0]) + 2 * modelo.conmutar_iman for t in nuevos_temporales)
+                        if mejor is None or cota < mejor["tiempo"]:
+                            siguientes.append((cota, nuevo, nuevos_temporales))
+            nivel = sorted(siguientes, key=lambda nodo: nodo[0])[:ancho]
+            if not nivel:
+                break
 
-                if camino_principal:
-                    # Simula mover pieza principal
-                    self.game_state.update_board(origen, destino)
+        if mejor is None:
+            print("Ningún bloqueador pudo despejar el camino.")
+        return mejor
 
-                    # Intenta volver a llevar el bloqueador a su posición original
-                    camino_retorno = self.encontrar_camino_simple(destino_temporal, bloqueador)
 
-                    if camino_retorno:
-                        # Reversión de simulaciones
-                        self.game_state.update_board(destino, origen)
-                        self.game_state.update_board(destino_temporal, bloqueador)
+    def planificar_captura(self, capturada, siguiente, estado=None, candidatos=4, limite_tiempo=1.0, fin=None):
+        """
+        Elige hueco del cementerio y tramos para retirar la pieza capturada. Se prueban los huecos libres
+        por orden de estimación (llevar la pieza más el viaje en vacío hasta siguiente, donde empieza el
+        siguiente tramo) y se queda el más rápido de los primeros candidatos con camino. Si ninguno tiene
+        camino libre, se apartan bloqueadores igual que en el movimiento principal. Todas esas búsquedas
+        comparten un único límite: fin (time.perf_counter) o, si no se da, limite_tiempo segundos.
+        - return (hueco, tramos) con tramos = bloqueadores apartados + camino al hueco + vueltas, o (None, None)
+        """
+        estado = estado or self.game_state
+        modelo = self.modelo_coste
+        huecos = sorted(self.cementerio.huecos_libres(),
+                        key=lambda h: modelo.estimacion(capturada, h) + modelo.estimacion(h, siguiente, iman=False))
+        if not huecos:
+            print("El cementerio está lleno.")
+        mejor, mejor_tiempo = (None, None), float('inf')
+        for i, hueco in enumerate(huecos):
+            if i >= candidatos and mejor[0] is not None:
+                break
+            camino = self.encontrar_camino_simple(capturada, hueco, estado, con_cementerio=True)
+            if camino:
+                tiempo = modelo.tiempo_camino(camino) + modelo.estimacion(hueco, siguiente, iman=False)
+                if tiempo < mejor_tiempo:
+                    mejor, mejor_tiempo = (hueco, [camino]), tiempo
+        if mejor[0] is not None:
+            return mejor
 
-                        return {
-                            "temporal": [bloqueador] + camino_temporal,
-                            "principal": camino_principal,
-                            "retorno": camino_retorno
-                        }
+        fin = fin if fin is not None else time.perf_counter() + limite_tiempo
+        for hueco in huecos[:candidatos]:
+            if time.perf_counter() > fin:
+                break
+            plan = self.mover_temporalmente_y_continuar(capturada, hueco, estado=estado, con_cementerio=True, fin=fin)
+            if plan:
+                tiempo = plan["tiempo"] + modelo.estimacion(hueco, siguiente, iman=False)
+                if tiempo < mejor_tiempo:
+                    mejor = (hueco, plan["temporales"] + [plan["principal"]] + plan["retornos"])
+                    mejor_tiempo = tiempo
+        return mejor
 
-                # Revertir simulación si falló
-                self.game_state.update_board(destino_temporal, bloqueador)
+    def planificar_movimiento(self, origen, destino, limite_tiempo=1.0):
+        """
+        Plan completo de una jugada: si hay captura, primero se lleva la pieza capturada al cementerio;
+        después el movimiento principal, directo o apartando bloqueadores y devolviéndolos a su sitio.
+        - limite_tiempo: segundos para todas las búsquedas de bloqueadores de la jugada (principal y captura)
+        - return {"captura": [tramos], "hueco": hueco o None, "temporales": [...], "principal": [...],
+                  "retornos": [...], "tiempo": s} o None si no hay forma de hacer la jugada
+        """
+        fin = time.perf_counter() + limite_tiempo
+        estado = copiar_estado(self.game_state)
+        captura = not estado.is_empty(*destino)
+        if captura:
+            # El movimiento principal se planifica con la pieza capturada ya retirada
+            estado.board[destino[1]][destino[0]] = '.'
 
-        print("Ningún bloqueador pudo despejar el camino.")
-        return None
+        camino = self.encontrar_camino_simple(origen, destino, estado)
+        if camino:
+            plan = {"temporales": [], "principal": camino, "retornos": []}
+        else:
+            plan = self.mover_temporalmente_y_continuar(origen, destino, estado=estado, fin=fin)
+            if plan is None:
+                return None
+
+        plan["captura"], plan["hueco"] = [], None
+        if captura:
+            siguiente = (plan["temporales"] or [plan["principal"]])[0][0]
+            plan["hueco"], plan["captura"] = self.planificar_captura(destino, siguiente, fin=fin)
+            if plan["captura"] is None:
+                print("No hay camino libre hasta el cementerio.")
+                return None
+
+        tramos = plan["captura"] + plan["temporales"] + [plan["principal"]] + plan["retornos"]
+        plan["tiempo"] = self.modelo_coste.tiempo_tramos(tramos)
+        return plan
+
+    def secuencia_valida(self, tramos):
+        """
+        Comprueba si los tramos se pueden ejecutar en ese orden sobre la partida actual (para reordenar el plan
+        en motor_control.optimizar_plan): cada tramo tiene que empezar en una casilla con pieza y no pasar por
+        la posición de ninguna otra pieza del tablero o del cementerio. Basta con comparar puntos: en la
+        retícula los nodos a media casilla de una pieza ya quedan fuera de su diámetro.
+        """
+        piezas = {(x, y) for y in range(8) for x in range(8) if not self.game_state.is_empty(x, y)}
+        piezas |= set(self.cementerio.huecos)
+        for camino in tramos:
+            origen = tuple(camino[0])
+            if origen not in piezas:
+                return False
+            piezas.discard(origen)
+            if any(tuple(punto) in piezas for punto in camino[1:]):
+                return False
+            piezas.add(tuple(camino[-1]))
+        return True
 
     
+# Piezas capturadas: se conservan entre jugadas mientras el servidor siga en marcha
+cementerio = Cementerio()
+
 def movimiento_completo(tablero, origen, destino):
-    modulo = CentralModule()
+    modulo = CentralModule(cementerio=cementerio)
     modulo.game_state.board = tablero
     origen = modulo.game_state.chess_to_coords(origen)
     destino = modulo.game_state.chess_to_coords(destino)
 
-    camino = modulo.encontrar_camino_simple(origen, destino)
-    if camino:
-        print("Camino encontrado:", camino)
-        modulo.game_state.update_board(origen, destino)
-        ejecutar_movimiento_completo(camino)
-    else:
-        resultado = modulo.mover_temporalmente_y_continuar(origen, destino)
-
-        if resultado:
-            print("Instrucciones:")
-            print("1. Mover bloqueador temporal:", resultado["temporal"])
-            print("2. Ejecutar movimiento principal:", resultado["principal"])
-            print("3. Volver a dejar la pieza en su lugar:", resultado["retorno"])
-            modulo.game_state.update_board(origen, destino)
-            ejecutar_movimiento_completo(resultado["principal"], resultado["temporal"])
-        else:
-            print("No se pudo resolver la obstrucción.")
\ No newline at end of file
+    plan = modulo.planificar_movimiento(origen, destino)
+    if plan is None:
+        print("No se pudo resolver la obstrucción.")
+        return
+
+    print(f"Instrucciones ({plan['tiempo']:.1f} s):")
+    for tramo in plan["captura"]:
+        print("0. Retirar la pieza capturada al cementerio:", tramo)
+    for temporal in plan["temporales"]:
+        print("1. Mover bloqueador temporal:", temporal)
+    print("2. Ejecutar movimiento principal:", plan["principal"])
+    for retorno in plan["retornos"]:
+        print("3. Volver a dejar la pieza en su lugar:", retorno)
+
+    capturada = modulo.game_state.board[destino[1]][destino[0]]
+    # El robot reordena los tramos si así tarda menos y se queda donde acaba, sin volver a la base
+    ejecutar_movimiento_completo(plan["principal"], plan["temporales"], plan["retornos"], caminos_captura=plan["captura"],
+                                 es_valido=modulo.secuencia_valida)
+    if plan["captura"]:
+        cementerio.guardar(plan["hueco"], capturada)
+    modulo.game_state.update_board(origen, destino)
@@ -1,26 +1,41 @@
 import time
+from itertools import permutations
 import serial
+from planificador import ModeloCoste
+
+ORIGEN_ROBOT = (4, 4)  # Casilla base del robot (e4)
+posicion_robot = ORIGEN_ROBOT  # Donde acabó el último movimiento: el robot ya no vuelve a la base cada vez
+
+# Letras del Arduino para una casilla completa y para media casilla en cada dirección (dx, dy)
+LETRAS_CASILLA = {(-1, 0): 'a', (1, 0): 'd', (0, 1): 's', (0, -1): 'w'}
+LETRAS_MEDIA_CASILLA = {(-1, 0): 'A', (1, 0): 'D', (0, 1): 'S', (0, -1): 'W'}
 
 def generar_instrucciones_movimiento(camino):
     """
-    Convierte una lista de coordenadas [(fila, col), ...] en instrucciones 'w', 'a', 's', 'd'
+    Convierte una lista de coordenadas [(x, y), ...] en instrucciones 'w', 'a', 's', 'd'. Los caminos por los
+    carriles entre casillas tienen pasos de media casilla: dos medias casillas seguidas en la misma dirección
+    se envían como una casilla completa y la que sobra con la letra en mayúscula ('W', 'A', 'S', 'D')
     """
 
-    instrucciones = []
+    tramos = []  # [dirección, número de medias casillas]
     for i in range(1, len(camino)):
-        f1, c1 = camino[i - 1]
-        f2, c2 = camino[i]
-
-        if f2 < f1:
-            instrucciones.append('a')  # izquierda
-        elif f2 > f1:
-            instrucciones.append('d')  # derecha
-        elif c2 > c1:
-            instrucciones.append('s')  # bajar
-        elif c2 < c1:
-            instrucciones.append('w')  # subir
-        else:
+        x1, y1 = camino[i - 1]
+        x2, y2 = camino[i]
+        dx, dy = x2 - x1, y2 - y1
+        medias = round(2 * (abs(dx) + abs(dy)))
+        if (dx and dy) or medias == 0 or medias != 2 * (abs(dx) + abs(dy)):
             raise ValueError(f"Movimiento inválido de {camino[i-1]} a {camino[i]}")
+        direccion = ((dx > 0) - (dx < 0), (dy > 0) - (dy < 0))
+        if tramos and tramos[-1][0] == direccion:
+            tramos[-1][1] += medias
+        else:
+            tramos.append([direccion, medias])
+
+    instrucciones = []
+    for direccion, medias in tramos:
+        instrucciones += [LETRAS_CASILLA[direccion]] * (medias // 2)
+        if medias % 2:
+            instrucciones.append(LETRAS_MEDIA_CASILLA[direccion])
 
     return instrucciones
 
@@ -48,13 +63,80 @@ def generar_camino_simple(origen, destino):
 def enviar_a_robot(letra, arduino):
     arduino.write(letra.encode())
 
-def ejecutar_movimiento_completo(camino_principal, camino_bloqueador=None, origen_robot=(4, 4), delay=0.5):
+def camino_en_vacio(origen, destino, direccion_previa=None):
+    """
+    Viaje sin pieza (electroimán desactivado, pasa por debajo de las piezas) en forma de L. Se elige la L
+    que empieza en el eje en el que ya se movía el robot, para no sumar un giro.
+    """
+    if direccion_previa is not None and direccion_previa[0] == 0:
+        # Primero el eje y: la L de generar_camino_simple recorrida al revés
+        return list(reversed(generar_camino_simple(destino, origen)))
+    return generar_camino_simple(origen, destino)
+
+def _direccion_final(camino):
+    (x1, y1), (x2, y2) = camino[-2], camino[-1]
+    return ((x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1))
+
+def tiempo_plan(tramos, origen_robot, modelo=None, volver_origen=False):
+    """
+    Tiempo estimado de ejecutar los tramos (caminos con pieza) en ese orden desde origen_robot: viajes en vacío,
+    tramos con el electroimán activado y sus activaciones. Un tramo que empieza donde acaba el anterior es la
+    misma pieza y se encadena sin soltarla.
+    """
+    modelo = modelo or ModeloCoste()
+    tiempo = 0.0
+    posicion, direccion = origen_robot, None
+    for i, camino in enumerate(tramos):
+        encadenado = i > 0 and camino[0] == posicion
+        if not encadenado:
+            if posicion != camino[0]:
+                tiempo += modelo.tiempo_camino(camino_en_vacio(posicion, camino[0], direccion), iman=False)
+            tiempo += 2 * modelo.conmutar_iman
+        tiempo += modelo.tiempo_camino(camino)
+        posicion, direccion = camino[-1], _direccion_final(camino)
+    if volver_origen and posicion != origen_robot:
+        tiempo += modelo.tiempo_camino(camino_en_vacio(posicion, origen_robot, direccion), iman=False)
+    return tiempo
+
+def optimizar_plan(tramos, origen_robot, modelo=None, es_valido=None, volver_origen=False, max_tramos=6):
+    """
+    Elige el orden de los tramos que minimiza el tiempo total (un TSP pequeño: se prueban todas las
+    permutaciones). Sin es_valido no se sabe qué órdenes respetan las piezas del tablero y se deja el orden
+    dado; con más de max_tramos tramos también.
+    - es_valido(tramos): True si los tramos, en ese orden, se pueden ejecutar sin chocar con ninguna pieza
+    - return (tramos en el mejor orden, tiempo estimado)
+    """
+    mejor = list(tramos)
+    mejor_tiempo = tiempo_plan(mejor, origen_robot, modelo, volver_origen)
+    if es_valido is None or len(tramos) < 2 or len(tramos) > max_tramos:
+        return mejor, mejor_tiempo
+    for orden in permutations(tramos):
+        tiempo = tiempo_plan(orden, origen_robot, modelo, volver_origen)
+        if tiempo < mejor_tiempo and es_valido(orden):
+            mejor, mejor_tiempo = list(orden), tiempo
+    return mejor, mejor_tiempo
+
+def ejecutar_movimiento_completo(camino_principal, caminos_bloqueadores=None, caminos_retorno=None,
+                                 origen_robot=None, delay=0.5, caminos_captura=None, es_valido=None,
+                                 volver_origen=False):
     """
-    Ejecuta uno o dos movimientos encadenados desde una posición de origen.
-    - camino_bloqueador: si existe, se mueve primero la pieza que obstruye.
+    Ejecuta un movimiento con las piezas que haya que apartar antes y devolver después, en el orden más
+    rápido que permitan las piezas (optimizar_plan).
+    - caminos_captura: si la jugada captura, tramos para llevar la pieza capturada al cementerio.
+    - caminos_bloqueadores: lista de caminos de las piezas que obstruyen.
     - camino_principal: movimiento final deseado.
-    - origen_robot: casilla base del robot (por defecto e4 = (4, 4))
+    - caminos_retorno: lista de caminos para devolver las piezas apartadas a su sitio.
+    - origen_robot: casilla en la que está el electroimán (por defecto, donde acabó el movimiento anterior)
+    - es_valido: comprueba si un orden de tramos es ejecutable (sin él se respeta el orden dado)
+    - volver_origen: volver a la casilla base (e4) al terminar
     """
+    global posicion_robot
+    origen_robot = origen_robot or posicion_robot
+
+    tramos = list(caminos_captura or []) + list(caminos_bloqueadores or []) + [camino_principal]
+    tramos += list(caminos_retorno or [])
+    tramos, tiempo = optimizar_plan(tramos, origen_robot, es_valido=es_valido, volver_origen=volver_origen)
+    print(f"[INFO] Tiempo estimado del robot: {tiempo:.1f} s")
 
     arduino = serial.Serial('COM9', 9600)
     time.sleep(2)  # Espera a que se establezca la conexión
@@ -71,65 +153,28 @@ def ejecutar_movimiento_completo(camino_principal, camino_bloqueador=None, orige
             time.sleep(delay)
         return camino[-1]
 
-    # 1. Movimiento del bloqueador si existe
-    if camino_bloqueador:
-        # Mover desde origen a la primera casilla del bloqueador
-        camino_hacia_bloqueador = generar_camino_simple(origen_robot, camino_bloqueador[0])
-        mover(camino_hacia_bloqueador, "hacia bloqueador")
-
-        # Activar electroimán
-        enviar_a_robot("e", arduino)
-
-        # Mover el bloqueador
-        pos_final_bloqueador = mover(camino_bloqueador, "bloqueador")
-
-        # Desactivar el electroimán
-        enviar_a_robot("f", arduino)
-
-        # 2. Movimiento directo a la pieza principal (sin volver al origen)
-        camino_hacia_principal = generar_camino_simple(pos_final_bloqueador, camino_principal[0])
-        mover(camino_hacia_principal, "hacia principal")
-
-        # Activar electroimán
-        enviar_a_robot("e", arduino)
-
-    else:
-        # Si no hay bloqueador, ir desde origen a la pieza principal
-        camino_hacia_principal = generar_camino_simple(origen_robot, camino_principal[0])
-        mover(camino_hacia_principal, "hacia principal")
-
-        # Activar electroimán
-        enviar_a_robot("e", arduino)
-
-    # 3. Mover la pieza principal
-    pos_final_principal = mover(camino_principal, "pieza principal")
-
-    # Desactivar el electroimán
+    posicion, direccion = origen_robot, None
+    for i, camino in enumerate(tramos):
+        # Si el tramo sigue con la misma pieza, el electroimán no se suelta
+        if i == 0 or camino[0] != posicion:
+            if i > 0:
+                enviar_a_robot("f", arduino)
+            # 1. Ir en vacío hasta la pieza
+            if posicion != camino[0]:
+                mover(camino_en_vacio(posicion, camino[0], direccion), "hacia la pieza")
+            # 2. Activar electroimán
+            enviar_a_robot("e", arduino)
+
+        # 3. Mover la pieza
+        posicion = mover(camino, "pieza")
+        direccion = _direccion_final(camino)
     enviar_a_robot("f", arduino)
+    posicion_robot = posicion
 
-    # 5. Devolver la pieza bloqueadora a su lugar (si existe)
-    if camino_bloqueador:
-        # Ir desde el origen al lugar temporal del bloqueador
-        camino_ir_bloqueador = generar_camino_simple(pos_final_principal, camino_bloqueador[-1])
-        mover(camino_ir_bloqueador, "ir a bloqueador temporal")
-
-        # Activar electroimán
-        enviar_a_robot("e", arduino)
-
-        # Volver a su posición original
-        camino_revertido = list(reversed(camino_bloqueador))
-        mover(camino_revertido, "devolver bloqueador")
-
-        # Desactivar el electroimán
-        enviar_a_robot("f", arduino)
-
-        # 4. Volver al origen desde la pieza principal
-        camino_regreso = generar_camino_simple(camino_bloqueador[0], origen_robot)
-        mover(camino_regreso, "regreso al origen")
-    else:
-        # 4. Volver al origen desde la pieza principal
-        camino_regreso = generar_camino_simple(pos_final_principal, origen_robot)
-        mover(camino_regreso, "regreso al origen")
+    # 4. Volver al origen solo si se pide
+    if volver_origen and posicion != ORIGEN_ROBOT:
+        mover(camino_en_vacio(posicion, ORIGEN_ROBOT, direccion), "regreso al origen")
+        posicion_robot = ORIGEN_ROBOT
 
     print("[INFO] Movimiento completo realizado.")
-    arduino.close()
\ No newline at end of file
+    arduino.close()
@@ -0,0 +1,194 @@
+import heapq
+from itertools import count
+
+'''
+Planificador de caminos del robot: A* sobre la cuadrícula 8x8 con un modelo de costes en segundos
+del pórtico. El estado de la búsqueda es (casilla, dirección del último paso), así se pueden cobrar
+los giros, y el camino se reconstruye con punteros al padre en lugar de copiarlo en cada expansión.
+
+La misma búsqueda funciona sobre la retícula de 17x17 nodos a media casilla: los centros de las casillas
+(coordenadas impares), las líneas entre casillas (pares) y el borde exterior del tablero (0 y 16).
+Por las líneas una pieza puede deslizarse entre otras sin tener que apartarlas.
+'''
+
+DIRECCIONES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+LADO_RETICULA = 17
+
+
+class ModeloCoste:
+
+    '''
+    Tiempos del robot en segundos.
+    - paso_iman: recorrer una casilla arrastrando una pieza (electroimán activado)
+    - paso_vacio: recorrer una casilla sin pieza (electroimán desactivado)
+    - giro: penalización por cambiar de eje o de sentido (el motor se para y la pieza se asienta)
+    - conmutar_iman: activar o desactivar el electroimán
+    Por defecto una casilla son 289 pasos de 2 x 4000 us (CodeArduino/main.ino), unos 2.3 s.
+    '''
+    def __init__(self, paso_iman=2.31, paso_vacio=2.31, giro=0.5, conmutar_iman=0.2):
+        self.paso_iman = paso_iman
+        self.paso_vacio = paso_vacio
+        self.giro = giro
+        self.conmutar_iman = conmutar_iman
+
+    def paso(self, iman=True):
+        return self.paso_iman if iman else self.paso_vacio
+
+    def tiempo_camino(self, camino, iman=True):
+        """Tiempo de recorrer un camino [(x, y), ...] con el modelo de costes (admite pasos de media casilla)"""
+        tiempo = 0.0
+        direccion = None
+        for (x1, y1), (x2, y2) in zip(camino, camino[1:]):
+            longitud = abs(x2 - x1) + abs(y2 - y1)
+            nueva = ((x2 - x1) / longitud, (y2 - y1) / longitud)
+            tiempo += longitud * self.paso(iman) + (self.giro if direccion is not None and nueva != direccion else 0)
+            direccion = nueva
+        return tiempo
+
+    def tiempo_tramos(self, tramos):
+        """
+        Tiempo de ejecutar seguidos varios tramos con pieza (imán activado): cada tramo, activar y desactivar
+        el imán, y el viaje en vacío desde el final de un tramo al principio del siguiente
+        """
+        tiempo = 0.0
+        for i, tramo in enumerate(tramos):
+            if i > 0:
+                tiempo += self.estimacion(tramos[i - 1][-1], tramo[0], iman=False)
+            tiempo += self.tiempo_camino(tramo) + 2 * self.conmutar_iman
+        return tiempo
+
+    def estimacion(self, origen, destino, iman=True, direccion=None, longitud_paso=1.0):
+        """
+        Cota inferior del tiempo entre dos casillas llegando a origen con la dirección dada: distancia Manhattan
+        más los giros inevitables. Es consistente, así que A* no tiene que reabrir estados cerrados.
+        - longitud_paso: casillas que avanza cada paso de la cuadrícula (0.5 en la retícula)
+        """
+        dx, dy = destino[0] - origen[0], destino[1] - origen[1]
+        necesarias = set()
+        if dx:
+            necesarias.add((1 if dx > 0 else -1, 0))
+        if dy:
+            necesarias.add((0, 1 if dy > 0 else -1))
+        # Un giro por cada dirección necesaria distinta de la actual
+        giros = len(necesarias - {direccion}) - (1 if direccion is None and necesarias else 0)
+        return (abs(dx) + abs(dy)) * longitud_paso * self.paso(iman) + giros * self.giro
+
+
+def _reconstruir(padres, estado):
+    camino = []
+    while estado is not None:
+        camino.append(estado[0])
+        estado = padres[estado]
+    return camino[::-1]
+
+
+def _expandir(origen, transitable, modelo, iman, heuristica, max_pasos, coste_casilla, limites, longitud_paso):
+    """
+    Núcleo de la búsqueda. Genera (estado, coste, padres) por orden de coste + heurística cada vez que
+    un estado queda cerrado. estado = (casilla, dirección del último paso).
+    limites = (x mínima, x máxima + 1, y mínima, y máxima + 1).
+    """
+    x0, x1, y0, y1 = limites
+    contador = count()
+    inicial = (origen, None)
+    costes = {inicial: 0.0}
+    pasos = {inicial: 0}
+    padres = {inicial: None}
+    cerrados = set()
+    abiertos = [(heuristica(inicial), next(contador), inicial)]
+
+    while abiertos:
+        _, _, estado = heapq.heappop(abiertos)
+        if estado in cerrados:
+            continue
+        cerrados.add(estado)
+        coste = costes[estado]
+        yield estado, coste, padres
+
+        if max_pasos is not None and pasos[estado] >= max_pasos:
+            continue
+        (x, y), direccion = estado
+        for dx, dy in DIRECCIONES:
+            nx, ny = x + dx, y + dy
+            if not (x0 <= nx < x1 and y0 <= ny < y1) or not transitable(nx, ny):
+                continue
+            nuevo_coste = coste + longitud_paso * modelo.paso(iman)
+            if direccion is not None and direccion != (dx, dy):
+                nuevo_coste += modelo.giro
+            if coste_casilla is not None:
+                nuevo_coste += coste_casilla(nx, ny)
+            vecino = ((nx, ny), (dx, dy))
+            if vecino in cerrados or nuevo_coste >= costes.get(vecino, float('inf')):
+                continue
+            costes[vecino] = nuevo_coste
+            pasos[vecino] = pasos[estado] + 1
+            padres[vecino] = estado
+            heapq.heappush(abiertos, (nuevo_coste + heuristica(vecino), next(contador), vecino))
+
+
+def planificar(origen, destino, transitable, modelo=None, iman=True, coste_casilla=None, lado=8, longitud_paso=1.0,
+               limites=None):
+    """
+    Camino de menor tiempo de origen a destino.
+    - transitable(x, y): si se puede entrar en la casilla
+    - iman: si se arrastra una pieza (usa paso_iman) o se viaja en vacío (paso_vacio)
+    - coste_casilla(x, y): coste adicional por entrar en la casilla (p. ej. atravesar una pieza)
+    - lado, longitud_paso: 8 y 1 para las casillas, LADO_RETICULA y 0.5 para la retícula
+    - limites: (x mínima, x máxima + 1, y mínima, y máxima + 1) si el área no es el tablero (0, lado, 0, lado)
+    - return (camino, tiempo) o (None, None) si no hay camino
+    """
+    modelo = modelo or ModeloCoste()
+    heuristica = lambda estado: modelo.estimacion(estado[0], destino, iman, estado[1], longitud_paso)
+    for estado, coste, padres in _expandir(origen, transitable, modelo, iman, heuristica, None, coste_casilla,
+                                           limites or (0, lado, 0, lado), longitud_paso):
+        if estado[0] == destino:
+            return _reconstruir(padres, estado), coste
+    return None, None
+
+
+def explorar(origen, transitable, modelo=None, iman=True, max_pasos=None, lado=8, longitud_paso=1.0, limites=None):
+    """
+    Camino más rápido desde origen a cada casilla alcanzable en como mucho max_pasos pasos.
+    - return dict casilla -> (camino, tiempo), sin incluir el origen
+    """
+    modelo = modelo or ModeloCoste()
+    resultados = {}
+    for estado, coste, padres in _expandir(origen, transitable, modelo, iman, lambda estado: 0, max_pasos, None,
+                                           limites or (0, lado, 0, lado), longitud_paso):
+        casilla = estado[0]
+        if casilla != origen and casilla not in resultados:
+            resultados[casilla] = (_reconstruir(padres, estado), coste)
+    return resultados
+
+
+def a_nodo(casilla):
+    """Nodo de la retícula en el centro de una casilla (x, y)"""
+    return (2 * casilla[0] + 1, 2 * casilla[1] + 1)
+
+
+def a_coordenadas(nodo):
+    """Posición en casillas de un nodo de la retícula: entera en los centros, con .5 en las líneas"""
+    return tuple((c - 1) // 2 if c % 2 else (c - 1) / 2 for c in nodo)
+
+
+def choques_reticula(ocupadas, diametro_pieza, usar_borde=True):
+    """
+    Nodos de la retícula en los que una pieza chocaría con alguna de las piezas de ocupadas.
+    Dos piezas chocan si sus centros están a menos de diametro_pieza casillas. Basta con mirar los nodos:
+    los caminos van por las líneas de la retícula y los centros de las casillas caen sobre nodos.
+    - usar_borde: si es False, el borde exterior del tablero (nodos 0 y 16) tampoco es transitable
+    - return dict nodo -> lista de casillas con las que choca
+    """
+    alcance = int(2 * diametro_pieza)  # Radio de búsqueda en nodos alrededor de cada pieza
+    choques = {}
+    for x, y in ocupadas:
+        cu, cv = a_nodo((x, y))
+        for u in range(cu - alcance, cu + alcance + 1):
+            for v in range(cv - alcance, cv + alcance + 1):
+                if ((u - cu) ** 2 + (v - cv) ** 2) / 4 < diametro_pieza ** 2:
+                    choques.setdefault((u, v), []).append((x, y))
+    if not usar_borde:
+        for i in range(LADO_RETICULA):
+            for nodo in [(0, i), (LADO_RETICULA - 1, i), (i, 0), (i, LADO_RETICULA - 1)]:
+                choques.setdefault(nodo, [])
+    return choques